@@ -0,0 +1,95 @@
+# bench_entities.py
+# エンティティクラス（__slots__ 版）と、同じメソッドで __dict__ を使うクラスの
+# 1 インスタンスあたりのメモリと属性アクセス・update の速度を比べる
+#
+# __dict__ 版は __slots__ を外した同じ名前空間からその場で作るので、違いはメモリ配置だけになる。
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+import pygame
+
+
+def dict_variant(cls):
+    """cls と同じメソッドを持ち、__slots__ を使わないクラスを作る"""
+    skip = set(cls.__slots__) | {"__slots__", "__dict__", "__weakref__"}
+    namespace = {k: v for k, v in vars(cls).items() if k not in skip}
+    return type(cls.__name__ + "Dict", (), namespace)
+
+
+def _bytes_per_instance(make, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [make() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count, items
+
+
+def _attr_read_ns(items, fields, rounds):
+    # getattr() 経由だと差が埋もれるので、obj.name の直接アクセスを並べたコードで測る
+    code = compile(
+        "for _ in range(rounds):\n"
+        "    for obj in items:\n"
+        + "".join(f"        obj.{name}\n" for name in fields),
+        "<attr_read>", "exec",
+    )
+    start = time.perf_counter()
+    exec(code, {"rounds": rounds, "items": items})
+    elapsed = time.perf_counter() - start
+    return elapsed * 1e9 / (rounds * len(items) * len(fields))
+
+
+def _update_us(enemies, platforms, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for enemy in enemies:
+            enemy.update(platforms, 520, 0.8, None)
+    return (time.perf_counter() - start) * 1e6 / (rounds * len(enemies))
+
+
+def measure_entities(project_root, count=2000, rounds=50):
+    """{"entities.<指標>": {"value", "unit", "higher_is_better"}} を返す"""
+    cwd = os.getcwd()
+    os.chdir(project_root)  # 画像は assets/ からの相対パスで読む
+    try:
+        pygame.display.init()
+        if pygame.display.get_surface() is None:
+            pygame.display.set_mode((1, 1))
+        from enemy import Enemy
+        from level import Platform, Goal
+        from player import Player
+
+        with open("config/config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        Enemy._load_source_images()  # 共有スプライトは計測の外で読み込んでおく
+        platforms = [Platform(300 + i * 200, 420, 120, 20) for i in range(20)]
+        cases = {
+            "enemy": (Enemy, lambda cls: cls(world_x=100.0, y=300.0), count,
+                      ("world_x", "y", "vy", "width", "height", "speed")),
+            "platform": (Platform, lambda cls: cls(300, 420, 120, 20), count,
+                         ("world_x", "y", "width", "height")),
+            "player": (Player, lambda cls: cls(200, 520, config), 20,
+                       ("x_screen", "y", "vy", "width", "height")),
+            "goal": (Goal, lambda cls: cls(3000, 520), 50,
+                     ("world_x", "y", "width", "height")),
+        }
+
+        results = {}
+        for name, (cls, make, n, fields) in cases.items():
+            for variant, suffix in ((cls, ""), (dict_variant(cls), "_dict")):
+                size, items = _bytes_per_instance(lambda: make(variant), n)
+                results[f"entities.{name}_bytes{suffix}"] = {
+                    "value": size, "unit": "bytes", "higher_is_better": False}
+                results[f"entities.{name}_attr_read{suffix}"] = {
+                    "value": _attr_read_ns(items, fields, rounds), "unit": "ns", "higher_is_better": False}
+                if name == "enemy":
+                    results[f"entities.enemy_update{suffix}"] = {
+                        "value": _update_us(items, platforms, 5), "unit": "us", "higher_is_better": False}
+        return results
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,93 @@
+# bench_ipc.py
+# ゲーム本体 ↔ custom_runner の往復時間を計測する
+#
+# main.py の CustomConnection と同じように 127.0.0.1:50000 で待ち受けて
+# server/custom_runner.py を起動し、tick を送ってから commands が返るまでを測る。
+# （ゲーム本体が起動中だとポートが使えないので止めてから実行する）
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+
+HOST = "127.0.0.1"
+PORT = 50000
+
+
+def sample_state(enemy_count=30):
+    return {
+        "player": {"x": 400.0, "screen_x": 200, "y": 460.0, "vy": 0.0, "on_ground": True},
+        "world": {"time_ms": 0, "camera_x": 200.0, "gravity": 0.8},
+        "enemies": [
+            {"id": i, "x": 100.0 + i * 50, "y": 520.0, "use_gravity": True, "speed": 2.0,
+             "move_range": 100, "width": 40, "height": 40, "scale": 1.0}
+            for i in range(enemy_count)
+        ],
+        "goal": {"x": 3000, "y": 520},
+        "platforms": [{"x": 300 + i * 200, "y": 420} for i in range(10)],
+        "collision": {"stomped_enemies": [], "touched_enemies": []},
+    }
+
+
+def _read_line(conn, buf, timeout):
+    conn.settimeout(timeout)
+    while b"\n" not in buf:
+        data = conn.recv(65536)
+        if not data:
+            raise ConnectionError("custom_runner disconnected")
+        buf += data
+    line, buf = buf.split(b"\n", 1)
+    return line, buf
+
+
+def measure_round_trip(project_root, iterations=500, warmup=20, enemy_count=30):
+    server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_sock.bind((HOST, PORT))
+    server_sock.listen(1)
+
+    env = dict(os.environ)
+    env.pop("VIBE_TRACE", None)
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join("server", "custom_runner.py")],
+        cwd=project_root, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        server_sock.settimeout(30)
+        conn, _ = server_sock.accept()
+        buf = b""
+        state = sample_state(enemy_count)
+
+        # 最初の tick では on_init の結果なども返ってくるので、落ち着くまで読み捨てる
+        for i in range(warmup):
+            conn.sendall((json.dumps({"type": "tick", "frame": i, "state": state}) + "\n").encode("utf-8"))
+            line, buf = _read_line(conn, buf, 10)
+        while True:
+            try:
+                line, buf = _read_line(conn, buf, 0.2)
+            except socket.timeout:
+                break
+
+        samples = []
+        for i in range(iterations):
+            msg = (json.dumps({"type": "tick", "frame": warmup + i, "state": state}) + "\n").encode("utf-8")
+            start = time.perf_counter()
+            conn.sendall(msg)
+            line, buf = _read_line(conn, buf, 10)
+            samples.append((time.perf_counter() - start) * 1000.0)
+        conn.close()
+    finally:
+        proc.kill()
+        proc.wait()
+        server_sock.close()
+
+    samples.sort()
+    return {
+        "mean": sum(samples) / len(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95)],
+        "p99": samples[int(len(samples) * 0.99)],
+    }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# performance.vectorized_enemies（EnemyBatch）と通常の Enemy で、make_state の "enemies" が
+# 値も型も同じになるかを確かめる（int の 389 と float の 389.0 はスクリプトからは別物）
+#
+#   python benchmarks/check_enemy_batch.py
+#
+# config/config.json の敵・足場・崖に、float の座標・API 制御・重力なしの敵を足して
+# 同じ操作を両方に行い、毎フレームの state_hash を比べる。違えば終了コード 1。
+# 足場を全部調べたときと、WorldChunks.platforms_near で近くだけ調べたときも比べる。
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from enemy import Enemy  # noqa: E402
+from enemy_batch import EnemyBatch, BatchedEnemy, available  # noqa: E402
+from level import Platform  # noqa: E402
+from level_sync import enemy_kwargs  # noqa: E402
+from replay import state_hash  # noqa: E402
+from world_chunks import WorldChunks  # noqa: E402
+
+
+def _entries(config):
+    entries = list(config.get("enemies", []))
+    entries += [
+        {"world_x": 640.5, "move_range": 60, "speed": 1.5, "width": 30, "height": 30},
+        {"world_x": 900, "y_offset": 200, "move_range": 40.0, "speed": 2, "width": 40, "height": 40},
+        {"world_x": 1200, "y_offset": 150, "move_range": 100, "speed": 3, "width": 40, "height": 40,
+         "use_gravity": False},
+    ]
+    return entries
+
+
+def _script(frame, enemies):
+    """スクリプトのコマンドに相当する代入（int と float を混ぜる）"""
+    if frame == 30:
+        enemies[0].use_api_control = True
+        enemies[0].vx = 2.5
+    if frame == 60 and len(enemies) > 1:
+        enemies[1].use_api_control = True
+        enemies[1].vx = -3
+    if frame == 90:
+        enemies[-1].speed = 4.0
+        enemies[-2].world_x = 1000
+        enemies[-2].vy = 0
+    if frame == 120:
+        enemies[0].use_api_control = False
+        enemies[-1].set_scale(1.5)
+
+
+def run(frames=300, gravity=0.8):
+    with open(os.path.join(PROJECT_ROOT, "config", "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    ground_y = config["screen"]["height"] - config["ground"]["y_offset"]
+    platforms = [Platform(p["world_x"], ground_y - p["y_offset"], p["width"], 20)
+                 for p in config.get("platforms", [])]
+    platforms.append(Platform(850, ground_y - 120, 200, 20))
+    cliffs = config.get("cliffs", [])
+    on_ground = lambda x: not any(c["start_x"] <= x <= c["end_x"] for c in cliffs)  # noqa: E731
+    world = WorldChunks(chunk_width=config.get("performance", {}).get("chunk_width", 512))
+    world.invalidate(platforms, cliffs, ground_y, config["screen"]["height"], config["ground"]["color"])
+
+    def make(factory):
+        Enemy._next_id = 0
+        return [factory(**enemy_kwargs(e, ground_y)) for e in _entries(config)]
+
+    plain = make(Enemy)
+    plain_near = make(Enemy)
+    batch = EnemyBatch()
+    batched = make(lambda **kwargs: BatchedEnemy(batch, **kwargs))
+    batch_near = EnemyBatch()
+    batched_near = make(lambda **kwargs: BatchedEnemy(batch_near, **kwargs))
+
+    mismatches = 0
+    for frame in range(frames):
+        for enemies in (plain, plain_near, batched, batched_near):
+            _script(frame, enemies)
+        for enemy in plain:
+            enemy.update(platforms, ground_y, gravity, on_ground)
+        for enemy in plain_near:
+            enemy.update(platforms, ground_y, gravity, on_ground, world.platforms_near)
+        batch.update(batched, platforms, ground_y, gravity, cliffs)
+        batch_near.update(batched_near, platforms, ground_y, gravity, cliffs, platforms_near=world.platforms_near)
+
+        expected = [e.to_state() for e in plain]
+        for name, actual in (("Enemy+near", [e.to_state() for e in plain_near]),
+                             ("batch", batch.snapshot(batched)),
+                             ("batch+near", batch_near.snapshot(batched_near))):
+            if state_hash(expected) == state_hash(actual):
+                continue
+            if not mismatches:
+                for a, b in zip(expected, actual):
+                    if json.dumps(a) != json.dumps(b):
+                        print(f"frame {frame}: Enemy {a}\n{name:>{len(str(frame)) + 12}} {b}")
+                        break
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    if not available():
+        print("numpy is not installed; nothing to check")
+        return 0
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    failed = 0
+    for gravity in (0.8, 1):
+        mismatches = run(gravity=gravity)
+        print(f"gravity={gravity!r}: {mismatches} mismatches")
+        failed += mismatches
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
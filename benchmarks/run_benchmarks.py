@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# ベンチマークを実行して結果を JSON で出力する
+#
+#   python benchmarks/run_benchmarks.py                      # 全シナリオを実行して表示
+#   python benchmarks/run_benchmarks.py --save-baseline      # 結果を baseline として保存
+#   python benchmarks/run_benchmarks.py --compare            # baseline と比較（悪化があれば終了コード 1）
+#   python benchmarks/run_benchmarks.py --only physics       # 名前に physics を含むものだけ
+#
+# ゲームループのシナリオは run_game.py --replay --headless で実際のメインループを回し、
+# --profile-out の集計から指標を取る。SDL はダミードライバを使う。
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from replay import write_recording  # noqa: E402
+from scenarios import build_scenarios  # noqa: E402
+from bench_ipc import measure_round_trip  # noqa: E402
+from bench_entities import measure_entities  # noqa: E402
+
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def run_scenario(name, scenario, workdir):
+    rec_path = os.path.join(workdir, f"{name}.rec")
+    out_path = os.path.join(workdir, f"{name}.json")
+    write_recording(rec_path, scenario["frames"])
+
+    proc = subprocess.run(
+        [sys.executable, "run_game.py", "--replay", rec_path, "--headless", "--profile-out", out_path],
+        cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    if proc.returncode != 0 or not os.path.exists(out_path):
+        tail = "\n".join(proc.stdout.splitlines()[-20:])
+        raise RuntimeError(f"scenario {name} failed (exit {proc.returncode}):\n{tail}")
+    with open(out_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def better(a, b, higher_is_better):
+    if a is None:
+        return b
+    return max(a, b) if higher_is_better else min(a, b)
+
+
+def run_all(only=None, repeat=1, skip_ipc=False):
+    results = {}
+    details = {}
+    failures = {}
+    scenarios = build_scenarios()
+
+    with tempfile.TemporaryDirectory(prefix="vibe_bench_") as workdir:
+        for name, scenario in scenarios.items():
+            if only and only not in name:
+                continue
+            print(f"running {name} ...", flush=True)
+            for _ in range(repeat):
+                try:
+                    summary = run_scenario(name, scenario, workdir)
+                except RuntimeError as e:
+                    # 3000 体などで落ちても（メモリ不足で kill されるなど）残りのシナリオは続ける
+                    print(e)
+                    failures[name] = str(e).splitlines()[0]
+                    break
+                details[name] = {"enemies": summary.get("enemies"), "frame": summary["frame"]}
+                limit = scenario.get("max_enemies")
+                if limit is not None and (summary.get("enemies") or 0) > limit:
+                    # 敵が溜まって測りたいものが測れていない（指標は出すが失敗として残す）
+                    failures[name] = f"{summary.get('enemies')} enemies left at the end (expected <= {limit})"
+                    print(f"{name}: {failures[name]}")
+                for metric_name, metric in scenario["metrics"].items():
+                    key = f"{name}.{metric_name}"
+                    entry = metric(summary)
+                    previous = results.get(key, {}).get("value")
+                    entry["value"] = better(previous, entry["value"], entry["higher_is_better"])
+                    results[key] = entry
+
+    if not only or only in "entities":
+        print("running entities ...", flush=True)
+        for _ in range(repeat):
+            for key, entry in measure_entities(PROJECT_ROOT).items():
+                previous = results.get(key, {}).get("value")
+                entry["value"] = better(previous, entry["value"], entry["higher_is_better"])
+                results[key] = entry
+
+    if not skip_ipc and (not only or only in "ipc_round_trip"):
+        print("running ipc_round_trip ...", flush=True)
+        for _ in range(repeat):
+            stats = measure_round_trip(PROJECT_ROOT)
+            for stat in ("p50", "p95", "p99"):
+                key = f"ipc_round_trip.{stat}"
+                previous = results.get(key, {}).get("value")
+                results[key] = {"value": better(previous, stats[stat], False),
+                                "unit": "ms", "higher_is_better": False}
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+        "details": details,
+        "failures": failures,
+    }
+
+
+def print_results(report):
+    width = max((len(k) for k in report["results"]), default=10)
+    for key, entry in report["results"].items():
+        print(f"  {key:<{width}}  {entry['value']:12.3f} {entry['unit']}")
+    for name, reason in report["failures"].items():
+        print(f"  {name:<{width}}  FAILED ({reason})")
+
+
+def compare(report, baseline, threshold):
+    """baseline より threshold(%) 以上悪化した指標のリストを返す"""
+    regressions = []
+    width = max((len(k) for k in report["results"]), default=10)
+    print(f"\ncomparison against baseline ({baseline['meta'].get('timestamp')}):")
+    for key, entry in report["results"].items():
+        old = baseline["results"].get(key)
+        if not old or not old["value"]:
+            print(f"  {key:<{width}}  (no baseline)")
+            continue
+        change = (entry["value"] - old["value"]) / old["value"] * 100.0
+        worse = -change if entry["higher_is_better"] else change
+        flag = "REGRESSION" if worse > threshold else ("improved" if worse < -threshold else "")
+        print(f"  {key:<{width}}  {old['value']:12.3f} -> {entry['value']:12.3f} {entry['unit']:<11} {change:+7.1f}%  {flag}")
+        if worse > threshold:
+            regressions.append(key)
+    # baseline では計測できていたのに今回は失敗したシナリオも悪化として扱う
+    for name in report["failures"]:
+        if any(key.startswith(name + ".") for key in baseline["results"]):
+            print(f"  {name:<{width}}  FAILED (measured in baseline)")
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vibe Code Game benchmarks")
+    parser.add_argument("--only", help="名前にこの文字列を含むシナリオだけ実行する")
+    parser.add_argument("--repeat", type=int, default=1, help="各シナリオを繰り返して最良値を取る")
+    parser.add_argument("--output", help="結果 JSON の出力先（省略時は標準出力に表示のみ）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="比較・保存に使う baseline JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="結果を baseline として保存する")
+    parser.add_argument("--compare", action="store_true", help="baseline と比較し、悪化があれば終了コード 1")
+    parser.add_argument("--threshold", type=float, default=10.0, help="悪化とみなす変化率（%%）")
+    parser.add_argument("--skip-ipc", action="store_true", help="custom_runner との往復計測を行わない")
+    args = parser.parse_args()
+
+    report = run_all(only=args.only, repeat=args.repeat, skip_ipc=args.skip_ipc)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
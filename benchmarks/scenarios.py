@@ -0,0 +1,184 @@
+# scenarios.py
+# ベンチマーク用の合成記録（src/replay.py の形式）を作る
+#
+# 各シナリオは「フレームのリスト」と「結果から取り出す指標（複数可）」の組。
+# max_enemies があれば、最後に残った敵の数がそれを超えたシナリオを失敗として記録する。
+# run_benchmarks.py が記録を書き出し、run_game.py --replay --headless で再生して
+# プロファイラの集計（--profile-out）から指標を計算する。
+#
+# プロファイラのリングバッファは直近 300 フレームなので、
+# シナリオは 300 フレームより長くして立ち上がり（レベル構築など）を集計から外す。
+import pygame
+
+from replay import make_frame
+
+
+FRAMES = 420
+GROUND_Y = 520  # config.json の screen.height - ground.y_offset
+SCREEN_HEIGHT = 600  # config.json の screen.height
+
+# 敵に触れても死なない・踏んでも消えない（シナリオの途中でゲームが終わらないように）
+HARMLESS = {"stomp_kills_enemy": False, "touch_kills_player": False, "bounce_on_stomp": False}
+
+
+def enemy_entries(count, spacing=37, start_x=-2000):
+    return [
+        {
+            "world_x": start_x + (i * spacing) % 9000,
+            "y_offset": (i * 53) % 200,
+            "move_range": 40 + i % 80,
+            "speed": 1 + (i % 3),
+            "width": 40,
+            "height": 40,
+            "use_gravity": i % 2 == 0,
+            **HARMLESS,
+        }
+        for i in range(count)
+    ]
+
+
+def platform_entries(count, spacing=120, start_x=-2000):
+    return [
+        {"world_x": start_x + i * spacing, "y_offset": 60 + (i * 37) % 140, "width": 80 + i % 60}
+        for i in range(count)
+    ]
+
+
+def level_commands(enemies=30, platforms=50, cliffs=None):
+    """1 フレーム目に流す、レベルを置き換えるコマンド"""
+    return [
+        # ゴールと崖は通り道から外しておく（クリア・落下で更新が止まらないように）
+        {"op": "set_config", "key": "goal.world_x", "value": 10 ** 7},
+        {"op": "set_config", "key": "cliffs", "value": cliffs or []},
+        {"op": "set_config", "key": "platforms", "value": platform_entries(platforms)},
+        {"op": "set_config", "key": "enemies", "value": enemy_entries(enemies)},
+        {"op": "set_enemy_collision", "key": "touch_kills_player", "value": False},
+    ]
+
+
+def gameplay(setup, per_frame=None, frames=FRAMES, move=True):
+    """タイトルを抜けて setup を流し、以降は右に歩き続ける（per_frame は毎フレームのコマンド）"""
+    pressed = (pygame.K_RIGHT,) if move else ()
+    result = [make_frame(keydown=(pygame.K_SPACE,), keyup=(pygame.K_SPACE,))]
+    result.append(make_frame(pressed=pressed, commands=setup))
+    for i in range(frames):
+        commands = per_frame(i) if per_frame else None
+        result.append(make_frame(pressed=pressed, commands=commands))
+    return result
+
+
+# ---- 指標 ----
+def fps_metric(summary):
+    mean = summary["frame"]["mean"]
+    return {"value": 1000.0 / mean if mean else 0.0, "unit": "fps", "higher_is_better": True}
+
+
+def section_metric(*sections):
+    def metric(summary):
+        value = sum(summary["sections"].get(name, {}).get("mean", 0.0) for name in sections)
+        return {"value": value, "unit": "ms/frame", "higher_is_better": False}
+    return metric
+
+
+def per_command_metric(count):
+    def metric(summary):
+        value = summary["sections"].get("commands", {}).get("mean", 0.0) * 1000.0 / count
+        return {"value": value, "unit": "us/command", "higher_is_better": False}
+    return metric
+
+
+# ---- コマンド単体のスループット ----
+COMMANDS_PER_FRAME = 100
+
+
+# set_config("enemies") は今ある敵をエントリの番号で書き換えるので（level_sync.EnemySync）、
+# config.json の初期敵 4 体（id 0〜3）がそのまま最初の 4 体になり、level_commands の 30 体は id 0〜29
+FIRST_LEVEL_ENEMY_ID = 0
+
+
+def _command_builders():
+    # 重力なしで画面の下（落下判定の SCREEN_HEIGHT + 100 より下）に出すので、次のフレームの落下判定で消え、
+    # 敵数は増え続けない（重力ありだと地面に着地して残り、max_enemies に達したあとは生成を断る時間しか測れない）
+    below_screen = SCREEN_HEIGHT + 1000
+    eid = lambda j: FIRST_LEVEL_ENEMY_ID + j % 30
+    return {
+        "set_enemy_vel": lambda i, j: {"op": "set_enemy_vel", "id": eid(j), "vx": 1.0, "vy": -1.0},
+        "set_enemy_pos": lambda i, j: {"op": "set_enemy_pos", "id": eid(j), "x": 100 + j, "y": GROUND_Y},
+        "set_enemy_scale": lambda i, j: {"op": "set_enemy_scale", "id": eid(j), "scale": 1.0 + (i + j) % 3 * 0.25},
+        "spawn_enemy": lambda i, j: {"op": "spawn_enemy", "x": j * 10, "y": below_screen,
+                                           "use_gravity": False, **HARMLESS},
+        "set_config_physics": lambda i, j: {"op": "set_config", "key": "physics.gravity", "value": 0.8},
+        "move_goal": lambda i, j: {"op": "move_goal", "dx": 0.0, "dy": 0.0},
+        "set_platform_velocity": lambda i, j: {"op": "set_platform_velocity", "index": j % 50, "vx": 0, "vy": 0},
+        "display_text": lambda i, j: {"op": "display_text", "text": f"score {j}", "duration": 1.0},
+        "draw_rect": lambda i, j: {"op": "draw_rect", "x": j, "y": 100, "width": 10, "height": 10,
+                                   "color": [255, 0, 0], "line_width": 0},
+    }
+
+
+def _command_scenario(build):
+    def per_frame(i):
+        commands = [build(i, j) for j in range(COMMANDS_PER_FRAME)]
+        if commands[0]["op"] == "draw_rect":
+            # オーバーレイが積み上がり続けないよう毎フレーム消す
+            commands.insert(0, {"op": "clear_overlay"})
+        return commands
+    return gameplay(level_commands(), per_frame, move=False)
+
+
+def _overlay_commands(i):
+    commands = [{"op": "clear_overlay"}] if i % 60 == 0 else []
+    for j in range(10):
+        commands.append({"op": "draw_circle", "x": (i * 7 + j * 73) % 800, "y": 100 + j * 30,
+                         "radius": 12, "color": [255, 0, 0], "width": 0})
+        commands.append({"op": "draw_line", "start_x": j * 80, "start_y": 50, "end_x": j * 80 + 40,
+                         "end_y": 300, "color": [0, 0, 255], "width": 2})
+    return commands
+
+
+def build_scenarios():
+    scenarios = {}
+    for count in (30, 300, 3000):
+        scenarios[f"physics_{count}_enemies"] = {
+            "frames": gameplay(level_commands(enemies=count, platforms=200)),
+            "metrics": {
+                "fps": fps_metric,
+                "enemy_update": section_metric("enemies"),
+                "collision": section_metric("collision"),
+            },
+        }
+
+    # 通り道の先に細かい崖を大量に置く（is_on_ground と地面描画が崖の数に比例する）
+    dense_cliffs = [{"start_x": 50000 + i * 40, "end_x": 50000 + i * 40 + 20} for i in range(2000)]
+    scenarios["collision_dense_cliffs"] = {
+        "frames": gameplay(level_commands(enemies=300, platforms=200, cliffs=dense_cliffs)),
+        "metrics": {
+            "fps": fps_metric,
+            "ground_checks": section_metric("enemies", "player", "collision"),
+            "ground_draw": section_metric("ground"),
+        },
+    }
+
+    scenarios["render_full"] = {
+        "frames": gameplay(level_commands(enemies=30, platforms=50), _overlay_commands),
+        "metrics": {
+            "fps": fps_metric,
+            "render": section_metric("background", "ground", "entities", "overlay", "flip"),
+        },
+    }
+
+    scenarios["make_state_json_1000_enemies"] = {
+        "frames": gameplay(level_commands(enemies=1000, platforms=50), move=False),
+        "metrics": {"send_state": section_metric("send_state")},
+    }
+
+    for op, build in _command_builders().items():
+        count = COMMANDS_PER_FRAME + (1 if op == "draw_rect" else 0)
+        scenarios[f"apply_command_{op}"] = {
+            "frames": _command_scenario(build),
+            "metrics": {"per_command": per_command_metric(count)},
+        }
+    # 生成した敵が消えずに溜まると、上限に達したあとは生成を断る時間しか測れない
+    # （最後のフレームで残っているのは level_commands の 30 体と、直前のフレームに生成した分だけのはず）
+    scenarios["apply_command_spawn_enemy"]["max_enemies"] = 30 + COMMANDS_PER_FRAME
+    return scenarios
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# 画像・効果音・フォントのパスのキャッシュ（.asset_cache/）を前もって作るスクリプト
+#
+# ゲームは起動時にキャッシュがなければ自分で作るので、実行しなくても動く。
+# 展示の PC に置くとき・アセットを差し替えたときに実行しておくと、最初の起動から PNG・MP3 のデコードを省ける。
+# 使われなくなった古いキャッシュのファイルも消す。
+#
+#   python build_assets.py
+
+import os
+import sys
+
+# プロジェクトルートをカレントディレクトリに設定
+project_root = os.path.dirname(os.path.abspath(__file__))
+os.chdir(project_root)
+
+# srcディレクトリをパスに追加
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+# 画面は出さない（convert にはディスプレイの初期化が要る）
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import asset_cache
+import sprite_atlas
+
+
+def main():
+    pygame.init()
+    pygame.mixer.init()   # ゲームと同じ既定の形式（main.py と同じ呼び方）
+    pygame.display.set_mode((1, 1))
+
+    keep = set()
+    for path, alpha in asset_cache.IMAGES:
+        asset_cache.load_image(path, alpha)
+        keep.add(asset_cache.cache_path(asset_cache.source_digest(path), "rgba" if alpha else "rgb"))
+        print(f"image  {path}")
+    for path in asset_cache.SOUNDS:
+        asset_cache.load_sound(path)
+        keep.add(asset_cache.cache_path(asset_cache.sound_key(path), "wav"))
+        print(f"sound  {path}")
+
+    for name in asset_cache.FONTS:
+        # インストールしたフォントも拾えるよう、毎回探し直す
+        print(f"font   {name}: {asset_cache.system_font_path(name, refresh=True)}")
+    keep.add(asset_cache.FONT_INDEX)
+
+    atlas = sprite_atlas.get_atlas()
+    key = sprite_atlas.cache_key()
+    keep.update(asset_cache.cache_path(key, ext) for ext in ("rgba", "json"))
+    print(f"atlas  {len(atlas.frames)} frames, {atlas.surface.get_width()}x{atlas.surface.get_height()}")
+
+    # 元のファイルが変わって使われなくなったものを消す（縮小したタイトル画像は今の元画像のものだけ残す）
+    digests = {asset_cache.source_digest(path) for path, _ in asset_cache.IMAGES}
+    removed = 0
+    for name in os.listdir(asset_cache.CACHE_DIR):
+        path = os.path.join(asset_cache.CACHE_DIR, name)
+        if path in keep or name.split("-")[0] in digests:
+            continue
+        os.remove(path)
+        removed += 1
+    print(f"done: {asset_cache.CACHE_DIR}/ ({removed} stale files removed)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,10 @@ import traceback
 # プロジェクトルートをパスに追加
 project_root = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "src"))
 
 from scripts import script_user  # 来場者がいじるファイル
+from tracer import Tracer  # VIBE_TRACE が設定されている時だけ有効
 
 # ---- script_user から呼ばれる API（コマンドを貯めるだけ） ----
 class RemoteAPI:
@@ -77,6 +79,7 @@ class RemoteAPI:
         JSON 形式で config を更新する
         例: api.update_config({"physics": {"gravity": 0.6, "max_speed": 15.0}})
         ネストされたキーは自動的に処理される
+        set_config を 1 キーずつ呼ぶのと同じ結果になるが、足場・敵・ゴールの再構築はまとめて 1 回で済む
         """
         def flatten_dict(d, parent_key=''):
             """ネストされた辞書をフラット化する"""
@@ -91,9 +94,11 @@ class RemoteAPI:
         
         flat_config = flatten_dict(config_dict)
         print(f"[DEBUG] update_config called with {len(flat_config)} items") # Debug print
-        for key, value in flat_config.items():
-            print(f"[DEBUG] set_config: {key} = {value}") # Debug print
-            self.set_config(key, value)
+        # 1 つのコマンドで送り、ゲーム側で全キーを書いてから再構築を 1 回ずつ行う
+        self.commands.append({
+            "op": "set_config_batch",
+            "values": flat_config,
+        })
 
     # ---- 敵関連 ----
     def set_enemy_vel(self, enemy_id, vx, vy=None):
@@ -281,8 +286,9 @@ class RemoteAPI:
         return None
 
     # ---- オーバーレイ描画API ----
-    def draw_circle(self, x, y, radius, color, width=0):
-        """画面上に円を描画（オーバーレイ）- x,yは世界座標（カメラ位置を自動補正）"""
+    def draw_circle(self, x, y, radius, color, width=0, persistent=True):
+        """画面上に円を描画（オーバーレイ）- x,yは世界座標（カメラ位置を自動補正）
+        persistent=False ならそのフレームだけ描く（毎 tick 描き直す図形向け）"""
         camera = self.get_camera_pos()
         screen_x = x
         if camera:
@@ -294,10 +300,12 @@ class RemoteAPI:
             "radius": int(radius),
             "color": list(color),
             "width": int(width),
+            "persistent": bool(persistent),
         })
 
-    def draw_rect(self, x, y, width, height, color, line_width=0):
-        """画面上に矩形を描画（オーバーレイ）- x,yは世界座標（カメラ位置を自動補正）"""
+    def draw_rect(self, x, y, width, height, color, line_width=0, persistent=True):
+        """画面上に矩形を描画（オーバーレイ）- x,yは世界座標（カメラ位置を自動補正）
+        persistent=False ならそのフレームだけ描く"""
         camera = self.get_camera_pos()
         screen_x = x
         if camera:
@@ -310,10 +318,12 @@ class RemoteAPI:
             "height": int(height),
             "color": list(color),
             "line_width": int(line_width),
+            "persistent": bool(persistent),
         })
 
-    def draw_line(self, start_x, start_y, end_x, end_y, color, width=1):
-        """画面上に線を描画（オーバーレイ）- x座標は世界座標（カメラ位置を自動補正）"""
+    def draw_line(self, start_x, start_y, end_x, end_y, color, width=1, persistent=True):
+        """画面上に線を描画（オーバーレイ）- x座標は世界座標（カメラ位置を自動補正）
+        persistent=False ならそのフレームだけ描く"""
         camera = self.get_camera_pos()
         screen_start_x = start_x
         screen_end_x = end_x
@@ -328,9 +338,10 @@ class RemoteAPI:
             "end_y": int(end_y),
             "color": list(color),
             "width": int(width),
+            "persistent": bool(persistent),
         })
 
-    def draw_enemy_overlay(self, enemy_id, shape="rect", color=(255, 0, 0), size=50, line_width=0):
+    def draw_enemy_overlay(self, enemy_id, shape="rect", color=(255, 0, 0), size=50, line_width=0, persistent=True):
         """
         指定した敵の位置にオーバーレイ図形を描画
         
@@ -340,6 +351,7 @@ class RemoteAPI:
         - color: RGB タプル
         - size: 図形のサイズ（rect なら幅=高さ、circle なら半径）
         - line_width: 0 で塗りつぶし、1以上で枠線のみ
+        - persistent: False ならそのフレームだけ描く（敵を追いかけて毎 tick 描き直すとき向け）
         """
         self.commands.append({
             "op": "draw_enemy_overlay",
@@ -348,6 +360,7 @@ class RemoteAPI:
             "color": list(color),
             "size": int(size),
             "line_width": int(line_width),
+            "persistent": bool(persistent),
         })
 
     def clear_overlay(self):
@@ -593,8 +606,13 @@ def main():
     f_r = sock.makefile("r")
     f_w = sock.makefile("w")
 
+    # ゲーム本体がシードを指定した場合（--record / --seed）は同じ乱数列にする
+    if os.environ.get("VIBE_SEED"):
+        random.seed(int(os.environ["VIBE_SEED"]))
+
     api = RemoteAPI()
     did_init = False
+    tracer = Tracer.from_env("custom_runner")
     
     print("[DEBUG] custom_runner started") # Debug print
 
@@ -620,6 +638,9 @@ def main():
             continue
 
         state = msg["state"]
+        frame = msg.get("frame")
+        if tracer.enabled and frame is not None:
+            tracer.flow("t", frame)
 
         # script_user.py がファイル上で更新されていれば再読み込みする
         try:
@@ -627,7 +648,8 @@ def main():
             if mtime != last_mtime:
                 last_mtime = mtime
                 try:
-                    importlib.reload(script_user)
+                    with tracer.span("reload", cat="script"):
+                        importlib.reload(script_user)
                     # reload 時は on_init を再実行させる
                     did_init = False
                     # ゲーム側にスクリプト更新通知を送る
@@ -663,7 +685,8 @@ def main():
         if not did_init and hasattr(script_user, "on_init"):
             try:
                 api.commands.clear()
-                script_user.on_init(state, api)
+                with tracer.span("on_init", {"frame": frame}, cat="script"):
+                    script_user.on_init(state, api)
                 cmds_init = api.commands[:]
                 api.commands.clear()
                 if cmds_init:
@@ -687,7 +710,8 @@ def main():
         # 毎フレーム on_tick 呼び出し
         try:
             api.commands.clear()
-            script_user.on_tick(state, api)
+            with tracer.span("on_tick", {"frame": frame}, cat="script"):
+                script_user.on_tick(state, api)
             cmds = api.commands[:]
             api.commands.clear()
         except Exception as e:
@@ -704,7 +728,12 @@ def main():
             print("on_tick error:", e, file=sys.stderr)
             cmds = []
 
-        out = json.dumps({"type": "commands", "commands": cmds})
+        reply = {"type": "commands", "commands": cmds}
+        if tracer.enabled:
+            # どのフレームへの応答かと、このプロセスで記録したスパンを一緒に送る
+            reply["frame"] = frame
+            reply["trace"] = tracer.drain()
+        out = json.dumps(reply)
         f_w.write(out + "\n")
         f_w.flush()
 
@@ -0,0 +1,193 @@
+# script_store.py
+# script_user.py の書き込みをアトミックに行い、番号付きの履歴を残す
+#
+# - 書き込みは一時ファイル + os.replace で行うため、custom_runner が
+#   書きかけのファイルを読み込むことはない
+# - 各バージョンは scripts/history/ に不変ファイルとして保存し、
+#   index.json の "current" がどのバージョンが有効かを指す
+# - ロールバックは保存済みファイルを差し替えて current を書き換えるだけ
+
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import time
+
+
+DEFAULT_SCRIPT_PATH = "scripts/script_user.py"
+DEFAULT_HISTORY_DIR = "scripts/history"
+MAX_HISTORY = 200  # これより古いバージョンは削除する
+
+
+def atomic_write(path, text):
+    """同じディレクトリに一時ファイルを書いてから os.replace で差し替える"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".py")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def validate_script(code):
+    """
+    script_user.py として読み込めるかを簡易チェックする。
+    構文エラーと on_tick の有無だけを見る（実行はしない）。
+    """
+    try:
+        tree = ast.parse(code, filename="script_user.py")
+    except SyntaxError as e:
+        return {"ok": False, "error": f"SyntaxError: {e.msg} (line {e.lineno})"}
+
+    functions = {
+        node.name for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    if "on_tick" not in functions:
+        return {"ok": False, "error": "on_tick が定義されていません"}
+    return {"ok": True, "error": None}
+
+
+class ScriptStore:
+    def __init__(self, script_path=DEFAULT_SCRIPT_PATH, history_dir=DEFAULT_HISTORY_DIR,
+                 max_history=MAX_HISTORY):
+        self.script_path = script_path
+        self.history_dir = history_dir
+        self.max_history = max_history
+        self.index_path = os.path.join(history_dir, "index.json")
+
+    # ---- index.json ----
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {"current": None, "latest": 0}
+
+    def _save_index(self, index):
+        os.makedirs(self.history_dir, exist_ok=True)
+        atomic_write(self.index_path, json.dumps(index, ensure_ascii=False, indent=2))
+
+    def _code_path(self, version):
+        return os.path.join(self.history_dir, f"v{version:04d}.py")
+
+    def _meta_path(self, version):
+        return os.path.join(self.history_dir, f"v{version:04d}.json")
+
+    @staticmethod
+    def _version_of(name):
+        """履歴のファイル名（v0001.py / v0001.json）からバージョン番号を返す。違う名前なら None
+
+        v9999 の次は v10000 と 5 桁になるので、桁数を決め打ちせず拡張子の前までを読む。
+        """
+        stem = name[1:].split(".")[0]
+        if not name.startswith("v") or not stem.isdigit():
+            return None
+        return int(stem)
+
+    def _activate(self, version):
+        """保存済みバージョンを script_user.py に差し替える"""
+        with open(self._code_path(version), "r", encoding="utf-8") as f:
+            code = f.read()
+        atomic_write(self.script_path, code)
+
+        # 同じ秒・同じサイズで差し替えると古い .pyc が使われることがあるので消しておく
+        try:
+            pyc = importlib.util.cache_from_source(self.script_path)
+            if os.path.exists(pyc):
+                os.remove(pyc)
+        except Exception:
+            pass
+
+    def _prune(self, index):
+        oldest_kept = index["latest"] - self.max_history
+        if oldest_kept <= 0:
+            return
+        for name in os.listdir(self.history_dir):
+            version = self._version_of(name)
+            if version is None:
+                continue
+            if version <= oldest_kept and version != index.get("current"):
+                os.remove(os.path.join(self.history_dir, name))
+
+    # ---- 公開 API ----
+    def save(self, code, prompt="", source="generate"):
+        """
+        新しいバージョンとして保存し、検証に通れば script_user.py に反映する。
+        戻り値はメタデータ dict（"activated" で反映されたかが分かる）。
+        """
+        validation = validate_script(code)
+        index = self._load_index()
+        version = index.get("latest", 0) + 1
+
+        meta = {
+            "version": version,
+            "prompt": prompt,
+            "source": source,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sha256": hashlib.sha256(code.encode("utf-8")).hexdigest(),
+            "length": len(code),
+            "validation": validation,
+        }
+
+        os.makedirs(self.history_dir, exist_ok=True)
+        atomic_write(self._code_path(version), code)
+        atomic_write(self._meta_path(version), json.dumps(meta, ensure_ascii=False, indent=2))
+
+        index["latest"] = version
+        if validation["ok"]:
+            self._activate(version)
+            index["current"] = version
+        self._save_index(index)
+        self._prune(index)
+
+        meta["activated"] = validation["ok"]
+        return meta
+
+    def rollback(self, version):
+        """指定バージョンを有効にする。存在しなければ KeyError、検証に通らなければ ValueError
+
+        保存時に検証に失敗したバージョンも履歴には残るので、反映する前にもう一度検証する。
+        """
+        if not os.path.exists(self._code_path(version)):
+            raise KeyError(version)
+        with open(self._code_path(version), "r", encoding="utf-8") as f:
+            validation = validate_script(f.read())
+        if not validation["ok"]:
+            raise ValueError(validation["error"])
+        index = self._load_index()
+        self._activate(version)
+        index["current"] = version
+        self._save_index(index)
+        return self.get_meta(version)
+
+    def get_meta(self, version):
+        try:
+            with open(self._meta_path(version), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {"version": version}
+
+    def list_versions(self):
+        index = self._load_index()
+        versions = []
+        if os.path.isdir(self.history_dir):
+            # 名前順だと v10000 が v9999 より前になるので、番号順に並べる
+            found = sorted(
+                self._version_of(name) for name in os.listdir(self.history_dir)
+                if name.endswith(".json") and self._version_of(name) is not None
+            )
+            for version in found:
+                meta = self.get_meta(version)
+                meta["current"] = meta.get("version") == index.get("current")
+                versions.append(meta)
+        return {"current": index.get("current"), "versions": versions}
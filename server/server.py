@@ -4,18 +4,29 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import uvicorn
-import openai
 
 import os
 import re
 import json
 from dotenv import load_dotenv
 
+from script_store import ScriptStore
 
 load_dotenv()
 app = FastAPI()
 
+
+def get_openai():
+    """openai は最初の生成リクエストで import する
+
+    import に時間がかかり、クラッシュ後の再起動でサーバーが応答するまでを遅らせるため。
+    uvicorn も起動するときだけ import する（__main__ を参照）。
+    """
+    import openai
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+
 # CORS設定を追加（ngrokなど外部からのアクセスに対応）
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +40,14 @@ class PromptBody(BaseModel):
     prompt: str
 
 
+class RollbackBody(BaseModel):
+    version: int
+
+
+# script_user.py はこのストア経由で書き込む（アトミック書き込み + 履歴）
+script_store = ScriptStore()
+
+
 # ストリーム出力用の区切りトークン
 COMMENT_START_TOKEN = "[[[COMMENT_START]]]"
 COMMENT_END_TOKEN = "[[[COMMENT_END]]]"
@@ -278,7 +297,7 @@ async def update_script(body: PromptBody):
             print("=== プロンプト挿入成功（末尾追加方式） ===")
 
         # 2. OpenAI API呼び出し（ChatGPT からコード生成）
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+        openai = get_openai()
         
         print(f"=== OpenAI APIリクエスト送信 ===")
         print(f"User prompt: {body.prompt}")
@@ -339,11 +358,14 @@ async def update_script(body: PromptBody):
                 code = extract_code_block(response_content)
 
         # 3. script_user.py を上書き保存(コードが空でない場合のみ)
+        version_meta = None
         if code:
             try:
-                with open("scripts/script_user.py", "w", encoding="utf-8") as f:
-                    f.write(code)
-                print(f"=== script_user.py updated successfully ({len(code)} chars) ===")
+                version_meta = script_store.save(code, prompt=body.prompt)
+                if version_meta["activated"]:
+                    print(f"=== script_user.py updated successfully (v{version_meta['version']}, {len(code)} chars) ===")
+                else:
+                    print(f"=== WARNING: v{version_meta['version']} failed validation, NOT activated: {version_meta['validation']['error']} ===")
             except Exception as e:
                 print(f"script write failed: {e}")
         else:
@@ -356,7 +378,9 @@ async def update_script(body: PromptBody):
         return {
             "status": "ok",
             "comment": comment,
-            "code_length": len(code)
+            "code_length": len(code),
+            "version": version_meta["version"] if version_meta else None,
+            "validation": version_meta["validation"] if version_meta else None,
         }
     
     except Exception as e:
@@ -384,7 +408,7 @@ async def update_script_stream(body: PromptBody):
         else:
             system_prompt += f"\n\n## ユーザーからの要望\n\n{body.prompt}"
 
-        openai.api_key = os.getenv("OPENAI_API_KEY")
+        openai = get_openai()
 
         def event_stream():
             full_text = ""
@@ -443,12 +467,27 @@ async def update_script_stream(body: PromptBody):
                 # 全チャンク受信後、CODE ブロックだけ抜き出して保存
                 print(f"=== Stream complete, extracting code (total length: {len(full_text)}) ===")
                 code = extract_code_block(full_text)
+                version_meta = None
+                save_error = None
                 if code:
-                    with open("scripts/script_user.py", "w", encoding="utf-8") as f:
-                        f.write(code)
+                    try:
+                        version_meta = script_store.save(code, prompt=body.prompt)
+                    except Exception as e:
+                        save_error = e
+                if save_error is not None:
+                    # 保存できなかったときも、検証に失敗したときと同じく生成中の表示を消す
+                    print(f"script write failed: {save_error}")
+                    if os.path.exists("status_generating.flag"):
+                        os.remove("status_generating.flag")
+                    yield f"\n[SERVER ERROR] script write failed: {save_error}"
+                elif version_meta and not version_meta["activated"]:
+                    print(f"警告: v{version_meta['version']} は検証に失敗したため反映しません: {version_meta['validation']['error']}")
+                    if os.path.exists("status_generating.flag"):
+                        os.remove("status_generating.flag")
+                elif version_meta:
                     with open("reload.flag", "w", encoding="utf-8") as f:
                         f.write("")
-                    print(f"=== script_user.py を更新しました（stream, {len(code)} chars） ===")
+                    print(f"=== script_user.py を更新しました（stream, v{version_meta['version']}, {len(code)} chars） ===")
                     
                     # 生成中フラグを削除
                     if os.path.exists("status_generating.flag"):
@@ -505,9 +544,8 @@ async def reset_script():
         with open("scripts/examples/default.py", "r", encoding="utf-8") as f:
             default_code = f.read()
         
-        # script_user.py を上書き
-        with open("scripts/script_user.py", "w", encoding="utf-8") as f:
-            f.write(default_code)
+        # script_user.py を上書き（履歴にも残す）
+        script_store.save(default_code, prompt="(reset)", source="reset")
         
         # リロードフラグを立てる
         with open("reload.flag", "w", encoding="utf-8") as f:
@@ -525,6 +563,39 @@ async def reset_script():
         }
 
 
+@app.get("/script_versions")
+async def script_versions():
+    """
+    保存済みの script_user.py のバージョン一覧を返す
+    """
+    try:
+        result = script_store.list_versions()
+        return {"status": "ok", **result}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/rollback_script")
+async def rollback_script(body: RollbackBody):
+    """
+    script_user.py を指定したバージョンに戻す（再生成はしない）
+    """
+    try:
+        meta = script_store.rollback(body.version)
+    except KeyError:
+        return {"status": "error", "message": f"バージョン {body.version} が見つかりません"}
+    except ValueError as e:
+        return {"status": "error", "message": f"バージョン {body.version} は検証に失敗したため反映しません: {e}"}
+    except Exception as e:
+        return {"status": "error", "message": f"ロールバック中にエラーが発生しました: {str(e)}"}
+
+    # リロードフラグを立てる
+    with open("reload.flag", "w", encoding="utf-8") as f:
+        f.write("")
+
+    return {"status": "ok", "version": meta.get("version"), "prompt": meta.get("prompt", "")}
+
+
 @app.get("/info")
 async def root():
     return {"message": "ゲームスクリプト更新サーバー稼働中"}
@@ -589,4 +660,5 @@ if __name__ == "__main__":
         print(f"⚠ ngrok の初期化に失敗しました: {e}")
         print("ngrok なしでサーバーを起動します\n")
     
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,216 @@
+# asset_cache.py
+# 画像と効果音を、起動時にデコードしなくてよい形で .asset_cache/ に置いておく
+#
+#   画像: PNG を展開した生の画素（RGBA / RGB）。拡大縮小したものも大きさごとに置ける。
+#   効果音: MP3 をミキサーの形式（周波数・ビット数・チャンネル数）の PCM にした WAV。
+# ファイル名は元のファイルの中身の SHA-1（＋大きさやミキサーの形式）なので、元のファイルが変われば自然に作り直される。
+# 起動時は mmap で開いてそのまま Surface / Sound に渡す（PNG・MP3 のデコードをしない）。
+#
+# キャッシュがなければ今まで通り元のファイルを読み、ついでにキャッシュを書く（書けなくても動く）。
+# 展示の PC では `python build_assets.py` で前もって作っておけば、最初の起動から速くなる。
+# システムフォントのパスもここに覚えておく（system_font_path）。
+import hashlib
+import json
+import mmap
+import os
+import struct
+import wave
+
+import pygame
+
+
+CACHE_DIR = ".asset_cache"
+
+# 生の画素ファイルの先頭: マジック, 形式 ("RGBA" / "RGB\0"), 幅, 高さ
+_IMAGE_HEADER = struct.Struct("<4s4sII")
+_IMAGE_MAGIC = b"VCIM"
+
+# 前もって作っておく画像と効果音（build_assets.py が使う）
+IMAGES = [("assets/background.png", False), ("assets/title.png", True)]
+SOUNDS = ["assets/jump.mp3", "assets/player_dead.mp3", "assets/enemy_dead.mp3", "assets/clear.mp3"]
+FONTS = ["meiryo"]
+
+# システムフォントの名前 -> ファイルのパス（system_font_path）
+FONT_INDEX = os.path.join(CACHE_DIR, "fonts.json")
+
+_digests = {}
+
+
+def source_digest(path):
+    """元のファイルの中身の SHA-1（同じ起動中は覚えておく）"""
+    digest = _digests.get(path)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = _digests[path] = hashlib.sha1(f.read()).hexdigest()
+    return digest
+
+
+def cache_path(key, ext):
+    return os.path.join(CACHE_DIR, f"{key}.{ext}")
+
+
+def write_atomic(path, chunks):
+    # 書きかけのファイルを次の起動で読まないよう、別名で書いてから置き換える
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+
+
+# ---- 画像 ----
+def save_surface(path, surface, alpha=True):
+    """Surface の画素を生のまま書く"""
+    fmt = "RGBA" if alpha else "RGB"
+    header = _IMAGE_HEADER.pack(_IMAGE_MAGIC, fmt.encode().ljust(4, b"\0"), *surface.get_size())
+    write_atomic(path, [header, pygame.image.tobytes(surface, fmt)])
+
+
+def load_surface(path, alpha=True):
+    """save_surface で書いたファイルを mmap で読んで、画面の形式に変換した Surface を返す。なければ None"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, fmt, width, height = _IMAGE_HEADER.unpack_from(mm)
+            fmt = fmt.rstrip(b"\0").decode()
+            if magic != _IMAGE_MAGIC or fmt != ("RGBA" if alpha else "RGB"):
+                return None
+            with memoryview(mm) as view:
+                pixels = view[_IMAGE_HEADER.size:]
+                try:
+                    raw = pygame.image.frombuffer(pixels, (width, height), fmt)
+                    # convert で画素をコピーするので、mmap はこのあと閉じてよい
+                    surface = raw.convert_alpha() if alpha else raw.convert()
+                    del raw
+                finally:
+                    pixels.release()
+    except (OSError, ValueError, struct.error, pygame.error):
+        return None
+    return surface
+
+
+def _convert(surface, alpha):
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+def load_image(path, alpha=True):
+    """pygame.image.load(path).convert_alpha()（alpha=False なら convert()）と同じ Surface を返す"""
+    try:
+        blob = cache_path(source_digest(path), "rgba" if alpha else "rgb")
+    except OSError:
+        blob = None
+    if blob is not None:
+        surface = load_surface(blob, alpha)
+        if surface is not None:
+            return surface
+    surface = pygame.image.load(path)
+    if blob is not None:
+        try:
+            save_surface(blob, surface, alpha)
+        except (OSError, pygame.error) as e:
+            print(f"Could not write asset cache for {path}: {e}")
+    return _convert(surface, alpha)
+
+
+def scaled_image(path, surface, size, smooth=True):
+    """path から読んだ surface を size に拡大縮小したもの。同じ元画像・大きさなら前に作ったものを読む"""
+    alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+    kind = "smooth" if smooth else "scale"
+    try:
+        blob = cache_path(f"{source_digest(path)}-{kind}{size[0]}x{size[1]}", "rgba" if alpha else "rgb")
+    except OSError:
+        blob = None
+    if blob is not None:
+        cached = load_surface(blob, alpha)
+        if cached is not None:
+            return cached
+    try:
+        scaled = pygame.transform.smoothscale(surface, size) if smooth else pygame.transform.scale(surface, size)
+    except (ValueError, pygame.error):
+        scaled = pygame.transform.scale(surface, size)
+    if blob is not None:
+        try:
+            save_surface(blob, scaled, alpha)
+        except (OSError, pygame.error) as e:
+            print(f"Could not write asset cache for {path}: {e}")
+    return scaled
+
+
+# ---- 効果音 ----
+def sound_key(path):
+    freq, size, channels = pygame.mixer.get_init()
+    return f"{source_digest(path)}-{freq}-{size}-{channels}"
+
+
+def save_sound(path, sound):
+    """Sound の PCM（ミキサーの形式のまま）を WAV に書く"""
+    freq, size, channels = pygame.mixer.get_init()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with wave.open(tmp, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(abs(size) // 8)
+        w.setframerate(freq)
+        w.writeframes(sound.get_raw())
+    os.replace(tmp, path)
+
+
+def load_sound_file(path):
+    """save_sound で書いた WAV を mmap で読む。ミキサーの形式と違えば None"""
+    freq, size, channels = pygame.mixer.get_init()
+    try:
+        with wave.open(path, "rb") as w:
+            if (w.getframerate(), w.getsampwidth(), w.getnchannels()) != (freq, abs(size) // 8, channels):
+                return None
+            data_len = w.getnframes() * w.getsampwidth() * w.getnchannels()
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # データは WAV の末尾にある。Sound(buffer=...) は中身をコピーする
+            with memoryview(mm) as view:
+                samples = view[len(mm) - data_len:]
+                try:
+                    return pygame.mixer.Sound(buffer=samples)
+                finally:
+                    samples.release()
+    except (OSError, EOFError, wave.Error, pygame.error):
+        return None
+
+
+def load_sound(path):
+    """pygame.mixer.Sound(path) と同じ音を返す（2 回目からは MP3 をデコードしない）"""
+    try:
+        blob = cache_path(sound_key(path), "wav")
+    except OSError:
+        blob = None
+    if blob is not None:
+        sound = load_sound_file(blob)
+        if sound is not None:
+            return sound
+    sound = pygame.mixer.Sound(path)
+    if blob is not None:
+        try:
+            save_sound(blob, sound)
+        except (OSError, wave.Error) as e:
+            print(f"Could not write asset cache for {path}: {e}")
+    return sound
+
+
+# ---- フォント ----
+def system_font_path(name, refresh=False):
+    """pygame.font.SysFont(name) が使うフォントファイルのパス（見つからなければ None）
+
+    SysFont は初回にシステムのフォントを全部調べる（Linux では fc-list を実行する）ので、
+    見つけたパスを FONT_INDEX に書いておき、次からはそれを使う。ファイルが消えていたら探し直す。
+    """
+    try:
+        with open(FONT_INDEX, "r", encoding="utf-8") as f:
+            fonts = json.load(f)
+    except (OSError, ValueError):
+        fonts = {}
+    if not refresh and name in fonts and (fonts[name] is None or os.path.exists(fonts[name])):
+        return fonts[name]
+    fonts[name] = pygame.font.match_font(name)
+    try:
+        write_atomic(FONT_INDEX, [json.dumps(fonts).encode()])
+    except OSError as e:
+        print(f"Could not write font cache: {e}")
+    return fonts[name]
@@ -0,0 +1,67 @@
+# asset_loader.py
+# 画像・効果音の読み込みをワーカースレッドで行う
+#
+# 起動直後はタイトル画面（読み込み中は白い画面と進み具合のバー）だけを出し、重い読み込みは裏で進める。
+# 読み込み処理は名前をつけて add() した順に 1 つずつ実行し、結果は result(name) で取り出す。
+# 失敗した処理は結果が default になる（今までの「読めなければ画像なしで動く」と同じ）。
+import threading
+
+
+class AssetLoader:
+    def __init__(self):
+        self._jobs = []            # (名前, 関数)
+        self._results = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._finished = threading.Event()
+        self.done = 0              # 終わった処理の数
+
+    @property
+    def total(self):
+        return len(self._jobs)
+
+    @property
+    def ready(self):
+        """全部読み終わったか"""
+        return self._finished.is_set()
+
+    @property
+    def progress(self):
+        return self.done / self.total if self._jobs else 1.0
+
+    def add(self, name, func):
+        """読み込み処理を追加する（start() の前に呼ぶ）"""
+        self._jobs.append((name, func))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        """読み込みが終わるまで待つ（記録・再生のように、開始のフレームを揃えたいとき）"""
+        if self._thread is None:
+            self._run()
+        self._finished.wait()
+
+    def has(self, name):
+        """name の処理が終わったか（失敗したときも True）"""
+        with self._lock:
+            return name in self._results
+
+    def result(self, name, default=None):
+        """終わった処理の結果。まだ終わっていない・失敗したときは default"""
+        with self._lock:
+            value = self._results.get(name)
+        return default if value is None else value
+
+    def _run(self):
+        for name, func in self._jobs:
+            try:
+                value = func()
+            except Exception as e:
+                print(f"Failed to load {name}: {e}")
+                value = None
+            with self._lock:
+                self._results[name] = value
+            self.done += 1
+        self._finished.set()
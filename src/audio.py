@@ -0,0 +1,59 @@
+# audio.py
+# 効果音の再生をまとめる（チャンネルの予約・同じ効果音の連打の間引き・同時再生数の上限）
+#
+# Sound.play() を直接呼ぶと、踏んだ敵の数だけ・判定の数だけ鳴らすことになり、大量に踏んだフレームでは
+# ミキサーのチャンネルが埋まって他の効果音が鳴らなくなる（音割れやフレームの引っかかりにもなる）。
+#   - 効果音ごとに専用のチャンネルを予約する（ほかの効果音や Sound.play() に取られない）
+#   - 同じ効果音を min_interval_ms 以内にもう一度鳴らそうとしたら無視する（同じフレームの重複もここでまとまる）
+#   - 予約したチャンネルが全部鳴っていたら、新しく鳴らさない（同時再生数の上限）
+import pygame
+
+
+class SoundEffects:
+    def __init__(self, min_interval_ms=50):
+        self.min_interval_ms = min_interval_ms
+        self._sounds = {}      # 名前 -> Sound（読み込み前は None）
+        self._channels = {}    # 名前 -> 予約したチャンネルのリスト
+        self._last_play = {}   # 名前 -> 最後に鳴らした時刻（ミリ秒）
+        self.played = 0        # 鳴らした回数（計測用）
+        self.skipped = 0       # 間引いた・上限で鳴らさなかった回数（計測用）
+
+    def reserve(self, channels):
+        """効果音ごとのチャンネルを予約する（{名前: チャンネル数}。ミキサーの初期化後に 1 回呼ぶ）"""
+        total = sum(channels.values())
+        if pygame.mixer.get_num_channels() < total:
+            pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for name, count in channels.items():
+            self._channels[name] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+            self._sounds.setdefault(name, None)
+            first += count
+
+    def set_sound(self, name, sound):
+        """効果音を登録する（読み込みが終わったときに呼ぶ）。予約していない効果音は Sound.play() で鳴らす"""
+        self._sounds[name] = sound
+
+    def play(self, name):
+        """効果音を鳴らす。間引いた・鳴らせなかったときは False"""
+        sound = self._sounds.get(name)
+        if sound is None:
+            return False
+        now = pygame.time.get_ticks()
+        last = self._last_play.get(name)
+        if last is not None and now - last < self.min_interval_ms:
+            self.skipped += 1
+            return False
+        channels = self._channels.get(name)
+        if channels is None:
+            channel = sound.play()
+        else:
+            channel = next((c for c in channels if not c.get_busy()), None)
+            if channel is not None:
+                channel.play(sound)
+        if channel is None:
+            self.skipped += 1
+            return False
+        self._last_play[name] = now
+        self.played += 1
+        return True
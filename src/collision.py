@@ -0,0 +1,69 @@
+# collision.py
+# プレイヤー（靴・本体）と全敵の当たり判定をまとめて行う
+#
+# main.py の衝突ループと同じ規則で判定する:
+#   - 靴の矩形に重なっていて、プレイヤーが落下中 (vy > 0) なら「踏んだ」
+#   - そうでなく本体の矩形に重なっていれば「触れた」
+# 敵の矩形は Enemy.get_rect と同じ（画面座標、足元基準）。
+#
+# EnemyBatch（enemy_batch.py）が使える場合は配列から全敵の矩形を一度に作って判定し、
+# そうでなければ敵ごとの Rect を使い回して collidelistall で判定する。
+# NumPy は EnemyBatch を渡されたときだけ使うので、そこで import する（通常の敵だけなら読み込まない）。
+import pygame
+
+
+def _overlaps(left, top, right, bottom, rect):
+    """配列の矩形群と pygame.Rect の colliderect と同じ判定"""
+    if rect.width <= 0 or rect.height <= 0:
+        import numpy as np
+        return np.zeros(len(left), dtype=bool)
+    return (left < rect.right) & (right > rect.left) & (top < rect.bottom) & (bottom > rect.top)
+
+
+class EnemyCollider:
+    def __init__(self):
+        # 毎フレーム Rect を作り直さないよう、敵の数だけ使い回す
+        self._rects = []
+
+    def hits(self, enemies, camera_x, shoe_rect, player_rect, falling, batch=None):
+        """(踏んだ敵, 触れた敵) のインデックスのリストを enemies の順で返す"""
+        if not enemies:
+            return [], []
+        if batch is not None:
+            return self._hits_batch(enemies, camera_x, shoe_rect, player_rect, falling, batch)
+        return self._hits_rects(enemies, camera_x, shoe_rect, player_rect, falling)
+
+    def _hits_batch(self, enemies, camera_x, shoe_rect, player_rect, falling, batch):
+        import numpy as np
+
+        idx = batch.indices(enemies)
+        width = batch.width[idx]
+        height = batch.height[idx]
+        # pygame.Rect と同じく 0 方向に切り捨てる
+        left = np.trunc(batch.world_x[idx] - camera_x) - width // 2
+        top = np.trunc(batch.y[idx] - height)
+        right = left + width
+        bottom = top + height
+
+        if falling:
+            stomped = _overlaps(left, top, right, bottom, shoe_rect)
+        else:
+            stomped = np.zeros(len(idx), dtype=bool)
+        touched = ~stomped & _overlaps(left, top, right, bottom, player_rect)
+        return np.flatnonzero(stomped).tolist(), np.flatnonzero(touched).tolist()
+
+    def _hits_rects(self, enemies, camera_x, shoe_rect, player_rect, falling):
+        rects = self._rects
+        while len(rects) < len(enemies):
+            rects.append(pygame.Rect(0, 0, 0, 0))
+        for rect, enemy in zip(rects, enemies):
+            rect.update(int(enemy.world_x - camera_x) - enemy.width // 2,
+                        enemy.y - enemy.height, enemy.width, enemy.height)
+        active = rects[:len(enemies)]
+
+        stomped = shoe_rect.collidelistall(active) if falling else []
+        touched = player_rect.collidelistall(active)
+        if stomped:
+            stomped_set = set(stomped)
+            touched = [i for i in touched if i not in stomped_set]
+        return stomped, touched
@@ -0,0 +1,68 @@
+# dirty_rects.py
+# 変わった部分だけを画面に送る描画モード（performance.dirty_rects）
+#
+# 背景と地面はカメラが止まっている間は変わらない。全体を描いたフレームで
+# 背景と地面だけを描いた状態を保存しておき、次のフレームからは
+#   1. 前のフレームで動くもの（プレイヤー・敵・ゴール・文字・オーバーレイ）を描いた矩形を保存した背景で塗り戻し、
+#   2. 動くものを今まで通り描き、
+#   3. 前のフレームと今のフレームの矩形だけを pygame.display.update(rects) で送る。
+# 足場は毎フレーム描き直す（止まっている足場の画素は変わらないので、送るのは動いている足場だけ）。
+# カメラ・画面サイズ・地面などが変わったフレームは、従来通り全体を描いて flip() する。
+import pygame
+
+
+class DirtyRects:
+    # 矩形がこれより多いときは 1 回の flip() のほうが速い
+    MAX_RECTS = 256
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.full = True           # このフレームが全体描画か
+        self._static = None        # 背景と地面だけを描いた画面のコピー
+        self._static_key = None
+        self._previous = []
+        self._current = []
+
+    def begin(self, screen, static_key):
+        """フレームの描画の最初に呼ぶ。True なら背景から全体を描くこと
+
+        static_key は背景と地面の見た目を決める値（カメラ位置・画面サイズなど）。
+        前のフレームと同じなら、前のフレームで動くものを描いた部分を背景で塗り戻して False を返す。
+        """
+        self._current = []
+        if not self.enabled:
+            self.full = True
+            return True
+        self.full = (static_key != self._static_key or self._static is None
+                     or self._static.get_size() != screen.get_size())
+        self._static_key = static_key
+        if not self.full:
+            for rect in self._previous:
+                screen.blit(self._static, rect, rect)
+        return self.full
+
+    def save_static(self, screen):
+        """全体描画のフレームで、背景と地面を描き終えたところで呼ぶ"""
+        if not self.enabled:
+            return
+        if self._static is None or self._static.get_size() != screen.get_size():
+            self._static = screen.copy()
+        else:
+            self._static.blit(screen, (0, 0))
+
+    def add(self, rect):
+        """動くものを描いた矩形を登録する（draw や blit の戻り値をそのまま渡せる）"""
+        if self.enabled and rect is not None:
+            self._current.append(rect)
+
+    def present(self):
+        """描いた内容を画面に送る（flip() の代わり）"""
+        if not self.enabled or self.full:
+            pygame.display.flip()
+        else:
+            rects = self._previous + self._current
+            if len(rects) > self.MAX_RECTS:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+        self._previous = self._current
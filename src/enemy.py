@@ -1,9 +1,26 @@
 import pygame
 
+from sprite_atlas import get_atlas
+
 
 class Enemy:
+    # インスタンスごとの __dict__ を持たない（属性アクセスが速く、大量に出してもメモリが少ない）
+    __slots__ = (
+        "id", "center_x", "world_x", "y", "move_range", "speed",
+        "width", "height", "base_width", "base_height", "scale",
+        "direction", "color", "use_gravity", "vx", "vy", "use_api_control",
+        "stomp_kills_enemy", "touch_kills_player", "bounce_on_stomp",
+        "images", "flipped_images", "source_images", "use_image",
+        "animation_timer", "current_frame_index", "ANIMATION_SPEED",
+    )
+
     _next_id = 0
 
+    # スプライトは全ての敵で共有する（敵ごとに 630x630 の元画像を読み込むとメモリが足りなくなる）
+    _source_images = None
+    _scaled_images = {}       # (幅, 高さ) -> (画像リスト, 左右反転した画像リスト)
+    MAX_SCALED_SIZES = 64
+
     def __init__(self, world_x, y, move_range=100, speed=2, width=40, height=40, scale=1.0, use_gravity=True,
                  stomp_kills_enemy=True, touch_kills_player=True, bounce_on_stomp=True):
         """
@@ -16,6 +33,12 @@ class Enemy:
         touch_kills_player: 触れるとプレイヤーが死ぬか
         bounce_on_stomp: 踏んだ時にバウンスするか
         """
+        self.reset(world_x, y, move_range, speed, width, height, scale, use_gravity,
+                   stomp_kills_enemy, touch_kills_player, bounce_on_stomp)
+
+    def reset(self, world_x, y, move_range=100, speed=2, width=40, height=40, scale=1.0, use_gravity=True,
+              stomp_kills_enemy=True, touch_kills_player=True, bounce_on_stomp=True):
+        """新しい敵として初期化する（EnemyPool から再利用するときも呼ばれる。ID は新しく振る）"""
         self.id = Enemy._next_id
         Enemy._next_id += 1
         self.center_x = world_x
@@ -40,18 +63,11 @@ class Enemy:
         self.touch_kills_player = touch_kills_player
         self.bounce_on_stomp = bounce_on_stomp
         
-        # Load images
+        # Load images (shared by all enemies)
         self.images = []
-        self.source_images = []
-        self.use_image = False
-        try:
-            for i in range(1, 5):
-                img = pygame.image.load(f'assets/enemy/{i}.png').convert_alpha()
-                self.source_images.append(img)
-            self.use_image = True
-        except Exception as e:
-            print(f"Failed to load enemy images: {e}")
-            self.use_image = False
+        self.flipped_images = []
+        self.source_images = Enemy._load_source_images()
+        self.use_image = bool(self.source_images)
 
         # Set initial scale
         self.set_scale(scale)
@@ -61,16 +77,38 @@ class Enemy:
         self.current_frame_index = 0
         self.ANIMATION_SPEED = 6  # 24 frames / 4 images = 6 frames per image
 
+    @classmethod
+    def _load_source_images(cls):
+        if cls._source_images is None:
+            cls._source_images = get_atlas().group("enemy")
+        return cls._source_images
+
+    @classmethod
+    def reload_images(cls, enemies):
+        """スプライトアトラスを読み終わったあとに、もういる敵に画像を付け直す（プールの敵は reset で付く）"""
+        cls._source_images = None
+        cls._scaled_images.clear()
+        for enemy in enemies:
+            enemy.source_images = cls._load_source_images()
+            enemy.use_image = bool(enemy.source_images)
+            enemy._refresh_images()
+
     def _refresh_images(self):
         if not self.source_images:
             return
 
         scaled_width = max(1, int(self.width * 1.2))
         scaled_height = max(1, int(self.height * 1.2))
-        self.images = [
-            pygame.transform.scale(img, (scaled_width, scaled_height))
-            for img in self.source_images
-        ]
+        size = (scaled_width, scaled_height)
+        cached = Enemy._scaled_images.get(size)
+        if cached is None:
+            if len(Enemy._scaled_images) >= Enemy.MAX_SCALED_SIZES:
+                # 一番古いサイズを捨てる（使用中の敵は自分の参照を持っているので影響しない）
+                Enemy._scaled_images.pop(next(iter(Enemy._scaled_images)))
+            images = [pygame.transform.scale(img, size) for img in self.source_images]
+            flipped = [pygame.transform.flip(img, True, False) for img in images]
+            cached = Enemy._scaled_images[size] = (images, flipped)
+        self.images, self.flipped_images = cached
 
     def set_scale(self, scale):
         safe_scale = max(0.25, min(float(scale), 4.0))
@@ -95,7 +133,8 @@ class Enemy:
             self.world_x = self.center_x - self.move_range
             self.direction *= -1
 
-    def update(self, platforms, ground_y, gravity, is_on_ground_func=None):
+    def update(self, platforms, ground_y, gravity, is_on_ground_func=None, platforms_near=None):
+        """platforms_near（WorldChunks.platforms_near）を渡すと、足場は敵の近くのものだけ調べる"""
         # 移動処理
         if self.use_api_control:
             # APIから速度が設定されている場合
@@ -127,6 +166,9 @@ class Enemy:
                 self.height
             )
             
+            if platforms_near is not None:
+                # 番号の小さい順なので、全部調べたときと同じ足場に乗る
+                platforms = [platforms[i] for i in platforms_near(enemy_rect_world.left, enemy_rect_world.right)]
             for platform in platforms:
                 platform_rect_world = pygame.Rect(
                     platform.world_x,
@@ -142,6 +184,7 @@ class Enemy:
                         self.vy = 0
 
     def draw(self, surface, camera_x):
+        """描いた範囲の Rect を返す"""
         # world_x を camera_x でずらして画面上の位置に変換
         screen_x = int(self.world_x - camera_x)
         
@@ -164,17 +207,45 @@ class Enemy:
             # 画像は左向き(direction=-1)がデフォルト
             if self.direction == 1:
                 # 右向きに移動中 -> 反転して右を向かせる
-                flipped_image = pygame.transform.flip(current_img, True, False)
-                surface.blit(flipped_image, (image_x, image_y))
+                flipped_image = self.flipped_images[self.current_frame_index]
+                return surface.blit(flipped_image, (image_x, image_y))
             else:
                 # 左向きに移動中 -> そのまま描画
-                surface.blit(current_img, (image_x, image_y))
+                return surface.blit(current_img, (image_x, image_y))
         else:
             # フォールバック: 矩形描画
             rect = pygame.Rect(screen_x - self.width // 2,
                                self.y - self.height,
                                self.width, self.height)
-            pygame.draw.rect(surface, self.color, rect)
+            return pygame.draw.rect(surface, self.color, rect)
+
+    def is_visible(self, camera_x, screen_width, screen_height):
+        """draw() で画面に何か描かれるか（画像は矩形より 1.2 倍大きい）"""
+        screen_x = int(self.world_x - camera_x)
+        if self.use_image and self.images:
+            half_width = self.images[0].get_width() // 2
+            width = self.images[0].get_width()
+            top = self.y - self.images[0].get_height()
+        else:
+            half_width = self.width // 2
+            width = self.width
+            top = self.y - self.height
+        left = screen_x - half_width
+        return left < screen_width and left + width > 0 and top < screen_height and self.y > 0
+
+    def to_state(self):
+        """make_state の "enemies" の 1 要素（EnemyBatch.snapshot も同じ内容・同じ型を返す）"""
+        return {
+            "id": self.id,
+            "x": self.world_x,
+            "y": self.y,
+            "use_gravity": self.use_gravity,
+            "speed": self.speed,
+            "move_range": self.move_range,
+            "width": self.width,
+            "height": self.height,
+            "scale": self.scale,
+        }
 
     def get_rect(self, camera_x):
         """当たり判定用の矩形を返す"""
@@ -182,3 +253,27 @@ class Enemy:
         return pygame.Rect(screen_x - self.width // 2,
                           self.y - self.height,
                           self.width, self.height)
+
+
+
+class EnemyPool:
+    """倒された・画面外に落ちた敵のインスタンスを取っておき、次の生成で再利用する"""
+
+    def __init__(self, factory, max_size=512):
+        self.factory = factory    # 新しく作るときに呼ぶ（Enemy と同じ引数）
+        self.max_size = max_size
+        self._free = []
+
+    def acquire(self, **kwargs):
+        if self._free:
+            enemy = self._free.pop()
+            enemy.reset(**kwargs)
+            return enemy
+        return self.factory(**kwargs)
+
+    def release(self, enemy):
+        if len(self._free) < self.max_size:
+            self._free.append(enemy)
+
+    def __len__(self):
+        return len(self._free)
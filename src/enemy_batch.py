@@ -0,0 +1,338 @@
+# enemy_batch.py
+# 敵の位置・速度などを NumPy の配列（structure of arrays）で持ち、
+# 往復移動・API からの速度・重力・地面と足場への着地を全敵まとめて計算する
+#
+# BatchedEnemy は Enemy のサブクラスで、world_x / y / vx / vy などの属性が
+# EnemyBatch の配列の自分のスロットを読み書きするプロパティになっている。
+# 描画やコマンド処理など既存のコードからは今までの Enemy と同じように扱える。
+#
+# どの敵が生きているかは main.py の enemies リストが正で、update() のたびに
+# リストに残っていないスロットを空きに戻す（削除側で特別なことをする必要はない）。
+# NumPy がなければ available() が False になり、main.py は通常の Enemy を使う。
+# NumPy は available() を呼んだときに初めて import する（vectorized_enemies が無効なら起動時に読み込まない）。
+#
+# 数値の属性は float64 の配列に持つが、通常の Enemy では config の整数がそのまま int で残る
+# （x=389 は 389 のまま、重力で動くと float になる）。make_state でスクリプトに見える型を
+# 変えないよう、数値の属性ごとに「通常の Enemy なら float になっているか」の列を持ち、
+# 代入と update() で Python の int / float と同じように伝える。
+from enemy import Enemy
+
+
+np = None  # available() で numpy を入れる
+
+
+def available():
+    """NumPy が使えれば import して True を返す"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+# 配列に持つ属性と、読み出すときの型
+FLOAT_FIELDS = ("world_x", "y", "vx", "vy", "center_x", "move_range", "speed")
+INT_FIELDS = ("direction", "width", "height")
+BOOL_FIELDS = ("use_gravity", "use_api_control")
+# FLOAT_FIELDS の各属性が、通常の Enemy なら float か（False なら int として読み出す）
+FLOAT_FLAGS = tuple(f"{name}_is_float" for name in FLOAT_FIELDS)
+
+# 足場判定で一度に作る (敵 × 足場) 行列の要素数の上限
+PLATFORM_CHUNK = 1 << 20
+# platforms_near を使うとき、この幅（px）ごとに敵をまとめて近くの足場を求める
+PLATFORM_NEAR_WIDTH = 512
+
+
+class EnemyBatch:
+    def __init__(self, capacity=64):
+        if not available():
+            raise ImportError("EnemyBatch requires numpy")
+        self.capacity = 0
+        self.alive = np.zeros(0, dtype=bool)
+        self._free = []
+        for name in FLOAT_FIELDS:
+            setattr(self, name, np.zeros(0, dtype=np.float64))
+        for name in INT_FIELDS:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        for name in BOOL_FIELDS + FLOAT_FLAGS:
+            setattr(self, name, np.zeros(0, dtype=bool))
+        self._grow(capacity)
+
+        self._cliffs_src = None
+        self._cliffs_len = -1
+        self._cliff_starts = None
+        self._cliff_max_ends = None
+
+    # ---- スロット管理 ----
+    def _grow(self, capacity):
+        old = self.capacity
+        for name in FLOAT_FIELDS + INT_FIELDS + BOOL_FIELDS + FLOAT_FLAGS + ("alive",):
+            arr = getattr(self, name)
+            grown = np.zeros(capacity, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        # 小さい番号から使うように逆順で積む
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def allocate(self):
+        if not self._free:
+            self._grow(max(64, self.capacity * 2))
+        slot = self._free.pop()
+        self.alive[slot] = True
+        return slot
+
+    def indices(self, enemies):
+        return np.fromiter((e._slot for e in enemies), dtype=np.intp, count=len(enemies))
+
+    def _reclaim(self, idx):
+        """enemies リストに残っていないスロットを空きに戻す"""
+        live = np.zeros(self.capacity, dtype=bool)
+        live[idx] = True
+        dead = np.flatnonzero(self.alive & ~live)
+        if len(dead):
+            self.alive[dead] = False
+            self._free.extend(dead[::-1].tolist())
+
+    # ---- 崖 ----
+    def _on_ground(self, x, cliffs):
+        """level.is_on_ground を配列で行う（崖の区間に入っていなければ True）"""
+        if cliffs is not self._cliffs_src or len(cliffs) != self._cliffs_len:
+            starts = np.array([c['start_x'] for c in cliffs], dtype=np.float64)
+            ends = np.array([c['end_x'] for c in cliffs], dtype=np.float64)
+            order = np.argsort(starts, kind="stable")
+            self._cliff_starts = starts[order]
+            # start_x 順に並べた end_x の累積最大: x 以前に始まる崖のどれかが x を覆っているか
+            self._cliff_max_ends = np.maximum.accumulate(ends[order])
+            self._cliffs_src = cliffs
+            self._cliffs_len = len(cliffs)
+        i = np.searchsorted(self._cliff_starts, x, side="right") - 1
+        on_cliff = (i >= 0) & (self._cliff_max_ends[np.maximum(i, 0)] >= x)
+        return ~on_cliff
+
+    # ---- 更新 ----
+    def update(self, enemies, platforms, ground_y, gravity, cliffs=None, x_range=None, platforms_near=None):
+        """全敵について Enemy.update と同じ計算を行う
+
+        x_range=(左端, 右端) を渡すと、その範囲（世界座標）にいる敵だけを更新する
+        platforms_near（WorldChunks.platforms_near）を渡すと、足場は敵の近くのものだけ調べる
+        """
+        idx = self.indices(enemies)
+        self._reclaim(idx)
+        if x_range is not None:
+            x = self.world_x[idx]
+            idx = idx[(x >= x_range[0]) & (x <= x_range[1])]
+        if not len(idx):
+            return
+
+        x = self.world_x[idx]
+        y = self.y[idx]
+        vx = self.vx[idx]
+        vy = self.vy[idx]
+        direction = self.direction[idx]
+        api = self.use_api_control[idx]
+        use_gravity = self.use_gravity[idx]
+
+        # 往復運動（API 制御中の敵は vx で動く）
+        center = self.center_x[idx]
+        move_range = self.move_range[idx]
+        patrol_x = x + self.speed[idx] * direction
+        upper = center + move_range
+        lower = center - move_range
+        over = ~api & (patrol_x > upper)
+        under = ~api & ~over & (patrol_x < lower)
+        x = np.where(api, x + vx, np.where(over, upper, np.where(under, lower, patrol_x)))
+        direction = np.where(over | under, -direction, direction)
+
+        # int / float の伝わり方（通常の Enemy で同じ計算をしたときの型）
+        x_float = self.world_x_is_float[idx]
+        clamped_float = self.center_x_is_float[idx] | self.move_range_is_float[idx]
+        patrol_float = x_float | self.speed_is_float[idx]
+        x_float = np.where(api, x_float | self.vx_is_float[idx],
+                           np.where(over | under, clamped_float, patrol_float))
+        y_float = self.y_is_float[idx]
+        vy_float = self.vy_is_float[idx]
+
+        # 重力
+        vy = np.where(use_gravity, vy + gravity, vy)
+        y = np.where(use_gravity, y + vy, y)
+        vy_float = np.where(use_gravity, vy_float | isinstance(gravity, float), vy_float)
+        y_float = np.where(use_gravity, y_float | vy_float, y_float)
+
+        # 地面判定（崖でない場所のみ）
+        land = use_gravity & (y >= ground_y) & (vy > 0)
+        if cliffs and land.any():
+            landing = np.flatnonzero(land)
+            land[landing] = self._on_ground(x[landing], cliffs)
+        y[land] = ground_y
+        vy[land] = 0.0
+        y_float[land] = isinstance(ground_y, float)
+        vy_float[land] = False
+
+        # 段差との判定（落下中の敵だけ）
+        falling = np.flatnonzero(use_gravity & (vy > 0))
+        if platforms and len(falling):
+            self._land_on_platforms(falling, x, y, vy, y_float, vy_float, idx, platforms, platforms_near)
+
+        self.world_x[idx] = x
+        self.y[idx] = y
+        self.vy[idx] = vy
+        self.direction[idx] = direction
+        self.world_x_is_float[idx] = x_float
+        self.y_is_float[idx] = y_float
+        self.vy_is_float[idx] = vy_float
+
+    def _land_on_platforms(self, falling, x, y, vy, y_float, vy_float, idx, platforms, platforms_near=None):
+        # pygame.Rect と同じく座標は 0 方向に切り捨てる
+        width = self.width[idx[falling]]
+        height = self.height[idx[falling]]
+        left = np.trunc(x[falling] - width // 2)
+        top = np.trunc(y[falling] - height)
+        right = left + width
+        bottom = top + height
+
+        # (敵の行, 調べる足場の番号) の組。番号は小さい順（リスト順で最初に乗った足場で止まるように）
+        if platforms_near is None:
+            groups = [(np.arange(len(falling)), np.arange(len(platforms)))]
+        else:
+            groups = []
+            bucket = np.floor(left / PLATFORM_NEAR_WIDTH)
+            for b in np.unique(bucket):
+                rows = np.flatnonzero(bucket == b)
+                near = platforms_near(left[rows].min(), right[rows].max())
+                if near:
+                    groups.append((rows, np.array(near, dtype=np.intp)))
+            if not groups:
+                return
+        used = np.unique(np.concatenate([near for _, near in groups]))
+        p_left = np.trunc(np.array([platforms[i].world_x for i in used], dtype=np.float64))
+        p_top = np.trunc(np.array([platforms[i].y for i in used], dtype=np.float64))
+        p_width = np.trunc(np.array([platforms[i].width for i in used], dtype=np.float64))
+        p_height = np.trunc(np.array([platforms[i].height for i in used], dtype=np.float64))
+        p_right = p_left + p_width
+        p_bottom = p_top + p_height
+        p_valid = (p_width > 0) & (p_height > 0)
+
+        for group_rows, near in groups:
+            cols = np.searchsorted(used, near)
+            step = max(1, PLATFORM_CHUNK // len(cols))
+            for start in range(0, len(group_rows), step):
+                r = group_rows[start:start + step]
+                hit = (p_valid[cols] & (left[r, None] < p_right[cols]) & (right[r, None] > p_left[cols])
+                       & (top[r, None] < p_bottom[cols]) & (bottom[r, None] > p_top[cols])
+                       & (bottom[r, None] <= p_top[cols] + 10))
+                # 元の実装と同じく、リスト順で最初に乗った足場で止まる
+                landed = hit.any(axis=1)
+                if landed.any():
+                    rows = falling[r[landed]]
+                    y[rows] = p_top[cols[hit.argmax(axis=1)[landed]]]
+                    vy[rows] = 0.0
+                    # pygame.Rect の top は int
+                    y_float[rows] = False
+                    vy_float[rows] = False
+
+    def fallen(self, enemies, limit):
+        """y が limit 以上（画面外に落ちた）敵のインデックスを返す"""
+        idx = self.indices(enemies)
+        return np.flatnonzero(self.y[idx] >= limit).tolist()
+
+    def visible(self, enemies, camera_x, screen_width, screen_height):
+        """Enemy.is_visible が True になる敵のインデックスを返す"""
+        idx = self.indices(enemies)
+        width = self.width[idx]
+        height = self.height[idx]
+        y = self.y[idx]
+        if Enemy._source_images:
+            # 画像は Enemy._refresh_images と同じく 1.2 倍
+            draw_width = np.maximum(1, (width * 1.2).astype(np.int64))
+            draw_height = np.maximum(1, (height * 1.2).astype(np.int64))
+        else:
+            draw_width, draw_height = width, height
+        left = np.trunc(self.world_x[idx] - camera_x) - draw_width // 2
+        shown = ((left < screen_width) & (left + draw_width > 0)
+                 & (y - draw_height < screen_height) & (y > 0))
+        return np.flatnonzero(shown).tolist()
+
+    # ---- make_state 用 ----
+    def _numbers(self, name, idx):
+        """FLOAT_FIELDS の列を、通常の Enemy と同じ int / float のリストにする"""
+        values = getattr(self, name)[idx].tolist()
+        flags = getattr(self, f"{name}_is_float")[idx].tolist()
+        return [v if f else int(v) for v, f in zip(values, flags)]
+
+    def snapshot(self, enemies, x_range=None):
+        """make_state の "enemies" と同じ内容を配列からまとめて作る（x_range の外の敵は除く）"""
+        idx = self.indices(enemies)
+        if x_range is not None:
+            x = self.world_x[idx]
+            keep = np.flatnonzero((x >= x_range[0]) & (x <= x_range[1]))
+            idx = idx[keep]
+            enemies = [enemies[i] for i in keep.tolist()]
+        columns = zip(
+            self._numbers("world_x", idx), self._numbers("y", idx), self.use_gravity[idx].tolist(),
+            self._numbers("speed", idx), self._numbers("move_range", idx),
+            self.width[idx].tolist(), self.height[idx].tolist(),
+        )
+        return [
+            {
+                "id": e.id,
+                "x": x,
+                "y": y,
+                "use_gravity": use_gravity,
+                "speed": speed,
+                "move_range": move_range,
+                "width": width,
+                "height": height,
+                "scale": e.scale,
+            }
+            for e, (x, y, use_gravity, speed, move_range, width, height) in zip(enemies, columns)
+        ]
+
+
+def _number_field(name):
+    """FLOAT_FIELDS の属性。代入した値が float かどうかを覚えておき、読むときは同じ型で返す"""
+    flag = f"{name}_is_float"
+
+    def fget(self):
+        value = getattr(self._batch, name)[self._slot]
+        return float(value) if getattr(self._batch, flag)[self._slot] else int(value)
+
+    def fset(self, value):
+        getattr(self._batch, name)[self._slot] = value
+        getattr(self._batch, flag)[self._slot] = isinstance(value, float)
+
+    return property(fget, fset)
+
+
+def _field(name, cast):
+    def fget(self):
+        return cast(getattr(self._batch, name)[self._slot])
+
+    def fset(self, value):
+        getattr(self._batch, name)[self._slot] = value
+
+    return property(fget, fset)
+
+
+class BatchedEnemy(Enemy):
+    """EnemyBatch の 1 スロットを参照する Enemy"""
+    __slots__ = ("_batch", "_slot")
+
+    def __init__(self, batch, *args, **kwargs):
+        self._batch = batch
+        super().__init__(*args, **kwargs)
+
+    def reset(self, *args, **kwargs):
+        # EnemyPool から再利用されたときは前のスロットが回収済みかもしれないので取り直す
+        self._slot = self._batch.allocate()
+        super().reset(*args, **kwargs)
+
+
+for _name in FLOAT_FIELDS:
+    setattr(BatchedEnemy, _name, _number_field(_name))
+for _fields, _cast in ((INT_FIELDS, int), (BOOL_FIELDS, bool)):
+    for _name in _fields:
+        setattr(BatchedEnemy, _name, _field(_name, _cast))
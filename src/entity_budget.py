@@ -0,0 +1,93 @@
+# entity_budget.py
+# 計測したフレーム時間に応じて敵の処理量を段階的に減らす
+#
+# 負荷と関係なく、画面から sleep_radius px 以上離れた敵は常に眠らせる（物理更新をしない）。
+# 眠るかどうかは位置とカメラだけで決まるので、近づけば同じように動き出す（再生しても同じ結果になる）。
+#
+#   レベル 0: 通常
+#   レベル 1: 画面外（cull_margin より遠く）の敵の更新を止める
+#   レベル 2: さらに spawn_enemy / spawn_snake を受け付けない
+#
+# フレーム時間（tick の待ちを除いた処理時間）の移動平均が frame_budget_ms を
+# window フレーム続けて超えたら 1 段上げ、その 7 割を window フレーム続けて下回ったら 1 段下げる。
+# max_entities は負荷と関係なく常に適用される上限。
+# 設定は config.json の "performance" セクション。
+
+
+NORMAL = 0
+CULL_OFFSCREEN = 1
+REFUSE_SPAWNS = 2
+
+LEVEL_NAMES = {
+    NORMAL: "normal",
+    CULL_OFFSCREEN: "culling off-screen updates",
+    REFUSE_SPAWNS: "culling off-screen updates, refusing spawns",
+}
+
+
+class EntityBudget:
+    def __init__(self, frame_budget_ms=15.0, max_entities=5000, cull_margin=400, sleep_radius=None, window=30):
+        self.frame_budget_ms = frame_budget_ms  # 0 / None なら負荷による段階変更をしない
+        self.max_entities = max_entities
+        self.cull_margin = cull_margin
+        self.sleep_radius = sleep_radius        # 0 / None なら距離では眠らせない
+        self.window = window
+        self.level = NORMAL
+        self.average_ms = None
+        self._over = 0
+        self._under = 0
+
+    @classmethod
+    def from_config(cls, config, fps):
+        perf = config.get('performance', {})
+        return cls(
+            frame_budget_ms=perf.get('frame_budget_ms', 1000.0 / fps * 0.9),
+            max_entities=perf.get('max_enemies', 5000),
+            cull_margin=perf.get('cull_margin', 400),
+            sleep_radius=perf.get('sleep_radius'),
+        )
+
+    def record(self, frame_ms):
+        """1 フレームの処理時間（ms）を渡して負荷レベルを更新する"""
+        if not self.frame_budget_ms:
+            return
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * 0.1
+
+        if self.average_ms > self.frame_budget_ms:
+            self._over += 1
+            self._under = 0
+        elif self.average_ms < self.frame_budget_ms * 0.7:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = 0
+            self._under = 0
+
+        if self._over >= self.window and self.level < REFUSE_SPAWNS:
+            self._set_level(self.level + 1)
+        elif self._under >= self.window and self.level > NORMAL:
+            self._set_level(self.level - 1)
+
+    def _set_level(self, level):
+        self.level = level
+        self._over = 0
+        self._under = 0
+        print(f"entity budget: level {level} ({LEVEL_NAMES[level]}), avg frame {self.average_ms:.1f} ms")
+
+    def update_range(self, camera_x, screen_width):
+        """更新する（眠っていない）敵の世界座標 x の範囲。全員更新するなら None"""
+        margins = []
+        if self.sleep_radius:
+            margins.append(self.sleep_radius)
+        if self.level >= CULL_OFFSCREEN:
+            margins.append(self.cull_margin)
+        if not margins:
+            return None
+        margin = min(margins)
+        return camera_x - margin, camera_x + screen_width + margin
+
+    def can_spawn(self, count):
+        return count < self.max_entities and self.level < REFUSE_SPAWNS
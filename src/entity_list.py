@@ -0,0 +1,77 @@
+# entity_list.py
+# 敵を描画順に保持するコンテナ（ID 索引と遅延削除つき）
+#
+# フレームの途中で消す敵は remove_later() で印をつけておき、
+# フレームに 1 回 flush() で印のついた敵をまとめて取り除く（順番は保つ）。
+# それまでは敵はリストに残るので、インデックスや描画順はフレーム中ずっと変わらない。
+# 印は ID で持つので、プールから再利用されて ID が変わった敵を誤って消すことはない。
+#
+# リストと同じように for / len / [i] / append / extend / clear が使える。
+
+
+class EntityList:
+    def __init__(self, items=(), on_remove=None):
+        self._items = []
+        self._by_id = {}
+        self._pending = set()
+        self.on_remove = on_remove  # flush() や clear() で取り除いた要素ごとに呼ぶ
+        self.extend(items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __contains__(self, item):
+        return self._by_id.get(item.id) is item
+
+    def get(self, entity_id):
+        """ID で要素を返す（なければ None）"""
+        return self._by_id.get(entity_id)
+
+    def append(self, item):
+        self._items.append(item)
+        self._by_id[item.id] = item
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def remove_later(self, item):
+        """次の flush() で取り除く"""
+        if item in self:
+            self._pending.add(item.id)
+
+    def is_pending(self, entity_id):
+        """remove_later() されて、次の flush() で取り除かれる ID か"""
+        return entity_id in self._pending
+
+    def flush(self):
+        """remove_later() した要素をまとめて取り除き、取り除いた数を返す"""
+        if not self._pending:
+            return 0
+        pending = self._pending
+        kept = []
+        removed = []
+        for item in self._items:
+            (removed if item.id in pending else kept).append(item)
+        self._items = kept
+        pending.clear()
+        for item in removed:
+            del self._by_id[item.id]
+            if self.on_remove is not None:
+                self.on_remove(item)
+        return len(removed)
+
+    def clear(self):
+        removed = self._items
+        self._items = []
+        self._by_id.clear()
+        self._pending.clear()
+        if self.on_remove is not None:
+            for item in removed:
+                self.on_remove(item)
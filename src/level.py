@@ -1,7 +1,18 @@
 # level.py
 import pygame
 
+from sprite_atlas import get_atlas
+from tile_cache import box_cache
+
+
+PLATFORM_HEIGHT = 20  # 足場の高さ（固定値）
+
 class Platform:
+    __slots__ = (
+        "initial_world_x", "initial_y", "world_x", "y", "width", "height", "color",
+        "vx", "vy", "move_enabled",
+    )
+
     def __init__(self, world_x, y, width, height):
         self.initial_world_x = world_x
         self.initial_y = y
@@ -39,9 +50,8 @@ class Platform:
     # ---- 描画・当たり判定 ----
     def draw(self, surface, camera_x):
         screen_x = int(self.world_x - camera_x)
-        rect = pygame.Rect(screen_x, self.y, self.width, self.height)
-        pygame.draw.rect(surface, (255, 255, 255), rect)  # 白で塗りつぶし
-        pygame.draw.rect(surface, self.color, rect, 3)  # 黒枠線(線幅3px)
+        # 白で塗りつぶし、黒枠線(線幅3px)
+        return box_cache.draw_box(surface, (screen_x, self.y, self.width, self.height), (255, 255, 255), self.color, 3)
 
     def get_rect(self, camera_x):
         screen_x = int(self.world_x - camera_x)
@@ -55,6 +65,11 @@ class Platform:
 
 
 class Goal:
+    __slots__ = (
+        "initial_world_x", "initial_y", "world_x", "y", "width", "height", "color",
+        "images", "use_image", "animation_timer", "current_frame_index", "ANIMATION_SPEED",
+    )
+
     def __init__(self, world_x, y, width=60, height=80, color=None):
         self.initial_world_x = world_x
         self.initial_y = y
@@ -66,22 +81,19 @@ class Goal:
         self.color = color if color else (255, 215, 0)
 
         # Load images
-        self.images = []
-        try:
-            for i in range(1, 5):
-                img = pygame.image.load(f'assets/goal/{i}.png').convert_alpha()
-                img = pygame.transform.scale(img, (self.width, self.height))
-                self.images.append(img)
-            self.use_image = True
-        except Exception as e:
-            print(f"Failed to load goal images: {e}")
-            self.use_image = False
+        self.load_images()
 
         # Animation state
         self.animation_timer = 0
         self.current_frame_index = 0
         self.ANIMATION_SPEED = 6
 
+    def load_images(self):
+        """スプライトアトラスからアニメーションのコマを取って、ゴールの大きさに拡大縮小する"""
+        self.images = [pygame.transform.scale(img, (self.width, self.height))
+                       for img in get_atlas().group("goal")]
+        self.use_image = bool(self.images)
+
     def draw(self, surface, camera_x):
         screen_x = int(self.world_x - camera_x)
         
@@ -93,15 +105,15 @@ class Goal:
                 self.current_frame_index = (self.current_frame_index + 1) % len(self.images)
             
             current_img = self.images[self.current_frame_index]
-            surface.blit(current_img, (screen_x, self.y - self.height))
+            return surface.blit(current_img, (screen_x, self.y - self.height))
         else:
             rect = pygame.Rect(screen_x, self.y - self.height, self.width, self.height)
             pygame.draw.rect(surface, self.color, rect)
-            pygame.draw.line(
+            return rect.union(pygame.draw.line(
                 surface, (100, 100, 100),
                 (screen_x + 10, self.y - self.height),
                 (screen_x + 10, self.y), 3
-            )
+            ))
 
     def get_rect(self, camera_x):
         screen_x = int(self.world_x - camera_x)
@@ -116,8 +128,6 @@ def load_level(config, ground_y):
     """
     config から platforms, cliffs, goal をまとめて生成
     """
-    PLATFORM_HEIGHT = 20  # 足場の高さ（固定値）
-    
     platforms = [
         Platform(
             world_x=p['world_x'],
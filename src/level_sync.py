@@ -0,0 +1,121 @@
+# level_sync.py
+# set_config("enemies" / "platforms") で送られてきたリストを、今ある敵・足場に差分で反映する
+#
+# スクリプトの on_init はリロードやリセットのたびにレベル全体を送り直すが、
+# 中身はほとんど同じことが多い。全部作り直す代わりに、
+#   - エントリの番号で既存の敵・足場と対応づけ、
+#   - 変わったフィールドだけ書き換え、
+#   - 増えた分だけ作り、減った分だけ消す。
+# 変わっていない敵・足場は今の位置や移動状態をそのまま保つ。
+from level import Platform, PLATFORM_HEIGHT
+
+
+def enemy_kwargs(entry, ground_y):
+    """config['enemies'] の 1 エントリを Enemy / make_enemy の引数にする"""
+    return dict(
+        world_x=entry['world_x'],
+        y=ground_y - entry.get('y_offset', 0),
+        move_range=entry['move_range'], speed=entry['speed'],
+        width=entry['width'], height=entry['height'],
+        scale=entry.get('scale', 1.0),
+        use_gravity=entry.get('use_gravity', True),
+        stomp_kills_enemy=entry.get('stomp_kills_enemy', True),
+        touch_kills_player=entry.get('touch_kills_player', True),
+        bounce_on_stomp=entry.get('bounce_on_stomp', True),
+    )
+
+
+# そのまま属性に書けばよいフィールド
+_PLAIN_FIELDS = ("move_range", "speed", "use_gravity",
+                 "stomp_kills_enemy", "touch_kills_player", "bounce_on_stomp")
+
+
+def _update_enemy(enemy, old, new):
+    """old から new に変わったフィールドだけ enemy に反映する"""
+    if new['world_x'] != old['world_x']:
+        enemy.center_x = new['world_x']
+        enemy.world_x = new['world_x']
+    if new['y'] != old['y']:
+        enemy.y = new['y']
+        enemy.vy = 0
+    for name in _PLAIN_FIELDS:
+        if new[name] != old[name]:
+            setattr(enemy, name, new[name])
+    if (new['width'], new['height'], new['scale']) != (old['width'], old['height'], old['scale']):
+        enemy.base_width = new['width']
+        enemy.base_height = new['height']
+        enemy.set_scale(new['scale'])
+
+
+class EnemySync:
+    """config['enemies'] の各エントリと、そこから作った敵の ID を覚えておく"""
+
+    def __init__(self, make_enemy):
+        self.make_enemy = make_enemy  # 敵を 1 体作る関数（Enemy と同じキーワード引数）
+        self._records = []            # エントリ番号ごとの (引数, 敵の ID)
+
+    def build(self, entries, ground_y):
+        """全エントリから敵を新しく作る（起動時・リセット時）"""
+        args = [enemy_kwargs(e, ground_y) for e in entries]
+        created = [self.make_enemy(**kwargs) for kwargs in args]
+        self._records = [(kwargs, enemy.id) for kwargs, enemy in zip(args, created)]
+        return created
+
+    def sync(self, enemies, entries, ground_y):
+        """enemies（EntityList）を entries に合わせる。(作った数, 書き換えた数, 消した数) を返す
+
+        エントリに対応しない敵（spawn_enemy で出した敵など）は、全部作り直していたときと同じく消える。
+        消す敵は remove_later() で印をつけるだけなので、次の flush() で取り除かれる。
+        """
+        created = updated = removed = 0
+        records = []
+        kept = set()
+        for i, entry in enumerate(entries):
+            kwargs = enemy_kwargs(entry, ground_y)
+            enemy = None
+            if i < len(self._records):
+                old_kwargs, enemy_id = self._records[i]
+                # 同じフレームで踏まれて remove_later() された敵は、もういないものとして扱う
+                if not enemies.is_pending(enemy_id):
+                    enemy = enemies.get(enemy_id)
+            if enemy is None:
+                # 新しいエントリか、踏まれて・落ちていなくなった（消える予定の）敵
+                enemy = self.make_enemy(**kwargs)
+                enemies.append(enemy)
+                created += 1
+            elif kwargs != old_kwargs:
+                _update_enemy(enemy, old_kwargs, kwargs)
+                updated += 1
+            kept.add(enemy.id)
+            records.append((kwargs, enemy.id))
+
+        for enemy in enemies:
+            if enemy.id not in kept and not enemies.is_pending(enemy.id):
+                enemies.remove_later(enemy)
+                removed += 1
+        self._records = records
+        return created, updated, removed
+
+
+def sync_platforms(platforms, entries, ground_y):
+    """platforms（リスト）を config['platforms'] 形式の entries に合わせる。変えた足場の数を返す
+
+    位置と幅が同じ足場はそのまま残す（移動中ならそのまま動き続ける）。
+    """
+    changed = 0
+    for i, p in enumerate(entries):
+        world_x = p['world_x']
+        y = ground_y - p['y_offset']
+        width = p['width']
+        if i < len(platforms):
+            old = platforms[i]
+            if (old.initial_world_x, old.initial_y, old.width) == (world_x, y, width):
+                continue
+            platforms[i] = Platform(world_x, y, width, PLATFORM_HEIGHT)
+        else:
+            platforms.append(Platform(world_x, y, width, PLATFORM_HEIGHT))
+        changed += 1
+    if len(platforms) > len(entries):
+        changed += len(platforms) - len(entries)
+        del platforms[len(entries):]
+    return changed
@@ -1,5 +1,12 @@
+# 起動時間の内訳（startup_timing.py）。import の時間も測るので、ほかの import より先に置く
+from startup_timing import StartupTimer, STARTUP_LOG_ENV
+startup_timer = StartupTimer()
+startup_timer.track_imports()
+
 import pygame
 import sys
+import argparse
+import atexit
 import json
 import random
 import socket
@@ -9,14 +16,71 @@ import time
 # import script_user  # TCP版では不要
 # from api import GameAPI  # TCP版では不要
 from player import Player
-from enemy import Enemy
-from level import load_level, is_on_ground
+from physics_params import PhysicsParams
+from enemy import Enemy, EnemyPool
+from enemy_batch import EnemyBatch, BatchedEnemy, available as enemy_batch_available
+from collision import EnemyCollider
+from entity_list import EntityList
+from entity_budget import EntityBudget
+from level import load_level
+import asset_cache
+import sprite_atlas
+from asset_loader import AssetLoader
+from audio import SoundEffects
+from level_sync import EnemySync, sync_platforms
+from profiler import FrameProfiler
+from text_cache import TextCache
+from dirty_rects import DirtyRects
+from world_chunks import WorldChunks
+from overlay import OverlayLayer
+from tracer import Tracer, TRACE_ENV, TRACE_MAX_ENV
+from replay import LiveInput, InputRecorder, InputReplay, ReplayConnection
+startup_timer.stop_imports()
+startup_timer.mark("imports")
+
+# =========================
+# コマンドライン引数
+# =========================
+arg_parser = argparse.ArgumentParser(description="Vibe Code Game")
+arg_parser.add_argument("--trace", metavar="PATH",
+                        help="Chrome trace-event 形式でフレーム・IPC・スクリプトの処理時間を書き出す（環境変数 VIBE_TRACE でも可）")
+arg_parser.add_argument("--trace-max-events", type=int, metavar="N",
+                        help="トレースのバッファ上限（古いイベントから捨てる）")
+arg_parser.add_argument("--record", metavar="PATH",
+                        help="入力・runner からのコマンド・乱数シードを記録する")
+arg_parser.add_argument("--replay", metavar="PATH",
+                        help="--record で記録したファイルを再生する（custom_runner は起動しない）")
+arg_parser.add_argument("--headless", action="store_true",
+                        help="ウィンドウ・音声なしで実行する（--replay と併用するとフレーム待ちもしない）")
+arg_parser.add_argument("--seed", type=int,
+                        help="乱数シード（custom_runner にも引き継ぐ）")
+arg_parser.add_argument("--profile-out", metavar="PATH",
+                        help="終了時にプロファイラの集計結果を JSON で書き出す（benchmarks/ が使用）")
+arg_parser.add_argument("--startup-log", metavar="PATH",
+                        help="起動にかかった時間の内訳（段階ごと・import ごと）を書き出す（環境変数 VIBE_STARTUP_LOG でも可）")
+cli_args, _ = arg_parser.parse_known_args()
+startup_log = cli_args.startup_log or os.environ.get(STARTUP_LOG_ENV)
+
+if cli_args.headless:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# custom_runner にも環境変数で引き継ぐ
+if cli_args.trace:
+    os.environ[TRACE_ENV] = cli_args.trace
+if cli_args.trace_max_events:
+    os.environ[TRACE_MAX_ENV] = str(cli_args.trace_max_events)
+tracer = Tracer.from_env("game")
+if tracer.enabled:
+    # 例外で落ちた場合もそこまでのトレースを残す
+    atexit.register(tracer.write)
 
 # =========================
 # 設定の読み込み
 # =========================
 with open('config/config.json', 'r', encoding='utf-8') as f:
     config = json.load(f)
+startup_timer.mark("config")
 
 # 設定値を変数に展開
 SCREEN_WIDTH = config['screen']['width']
@@ -40,58 +104,141 @@ pygame.mixer.init()
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Side-scrolling Game (Parallax Background)")
 clock = pygame.time.Clock()
+startup_timer.mark("pygame init")
 
 # 日本語フォントの設定
 font_path = "C:/Windows/Fonts/msgothic.ttc"
-if os.path.exists(font_path):
-    font = pygame.font.Font(font_path, 16)
-    large_font = pygame.font.Font(font_path, 20)  # さらに小さく
-else:
-    font = pygame.font.SysFont("meiryo", 16)
-    large_font = pygame.font.SysFont("meiryo", 20)
-
-# 背景画像の読み込み
-try:
-    bg_image = pygame.image.load('assets/background.png').convert()
-    bg_width = bg_image.get_width()
-    bg_height = bg_image.get_height()
-except:
-    bg_image = None
-    bg_width = SCREEN_WIDTH
-    bg_height = SCREEN_HEIGHT
-
-# タイトル画像の読み込み
-try:
-    title_image = pygame.image.load('assets/title.png').convert_alpha()
-except:
-    title_image = None
-
-# 効果音の読み込み
-try:
-    jump_sound = pygame.mixer.Sound('assets/jump.mp3')
-    player_dead_sound = pygame.mixer.Sound('assets/player_dead.mp3')
-    enemy_dead_sound = pygame.mixer.Sound('assets/enemy_dead.mp3')
-    clear_sound = pygame.mixer.Sound('assets/clear.mp3')
-except Exception as e:
-    print(f"Failed to load sound effects: {e}")
-    jump_sound = None
-    player_dead_sound = None
-    enemy_dead_sound = None
-    clear_sound = None
+if not os.path.exists(font_path):
+    # SysFont("meiryo") と同じフォント。SysFont は起動のたびにシステムのフォントを全部調べる（Linux では fc-list）ので、
+    # 見つけたパスを .asset_cache/ に覚えておく（見つからなければ None = pygame の既定のフォント）
+    font_path = asset_cache.system_font_path("meiryo")
+font = pygame.font.Font(font_path, 16)
+large_font = pygame.font.Font(font_path, 20)  # さらに小さく
+startup_timer.mark("fonts")
+
+# 変わった部分だけ画面に送る描画モード（dirty_rects.py、既定は無効）
+dirty_rects = DirtyRects(enabled=config.get('performance', {}).get('dirty_rects', False))
+
+# HUD の文字は変わらない限り描画済みの Surface を使い回す（text_cache.py）
+text_cache = TextCache(max_size=config.get('performance', {}).get('text_cache_size', 128))
+
+# 画像・効果音はワーカースレッドで読み込む（asset_loader.py）。読み込み中もタイトル画面は動き、
+# 読み終わるまではゲームを始めない。読み終わったものから apply_loaded_assets() で使い始める。
+# 2 回目からは .asset_cache/ の展開済みの画素・PCM を読む（asset_cache.py）
+def load_sounds():
+    return {name: asset_cache.load_sound(f'assets/{name}.mp3')
+            for name in ("jump", "player_dead", "enemy_dead", "clear")}
+
+
+asset_loader = AssetLoader()
+asset_loader.add("title", lambda: asset_cache.load_image('assets/title.png'))
+asset_loader.add("background", lambda: asset_cache.load_image('assets/background.png', alpha=False))
+asset_loader.add("sounds", load_sounds)
+sprite_atlas.defer()   # 読み終わるまでに作ったプレイヤー・敵・ゴールは、あとで画像を付け直す
+asset_loader.add("sprites", sprite_atlas.load_atlas)
+
+bg_image = None
+bg_width = SCREEN_WIDTH
+bg_height = SCREEN_HEIGHT
+title_image = None
+title_loaded = False  # タイトル画像の読み込み結果を受け取ったか（読めなかったときは title_image は None のまま）
+assets_ready = False
+
+# 効果音は audio.py を通して鳴らす（効果音ごとにチャンネルを予約し、連打は間引く）
+sound_effects = SoundEffects(min_interval_ms=config.get('performance', {}).get('sound_min_interval_ms', 50))
+sound_effects.reserve({"jump": 2, "player_dead": 1, "enemy_dead": 3, "clear": 1})
+
+# まだ何も読んでいない白い画面を先に出しておく
+screen.fill((255, 255, 255))
+pygame.display.flip()
+asset_loader.start()
+
+# タイトル画面は画面サイズごとに 1 回だけ合成して使い回す（毎フレーム smoothscale しない）
+title_cache = {"size": None, "surface": None}
+
+
+def title_screen():
+    """白背景にタイトル画像を載せた画面全体の Surface を返す"""
+    size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+    if title_cache["size"] == size:
+        return title_cache["surface"]
+    surface = pygame.Surface(size).convert()
+    # 白背景で描画
+    surface.fill((255, 255, 255))
+    # タイトル画像をアスペクト比を保ってリサイズして描画
+    if title_image:
+        # 画面に対する最大サイズ（マージンを残す）
+        max_w = int(SCREEN_WIDTH * 1.35)
+        max_h = int(SCREEN_HEIGHT * 0.9)
+        iw, ih = title_image.get_size()
+        # scale <= 1.0 にして拡大しすぎないようにする（必要なら1.0を超える許可可）
+        scale = min(max_w / iw, max_h / ih)
+        new_w = max(1, int(iw * scale))
+        new_h = max(1, int(ih * scale))
+        # 縮小した画像も大きさごとにキャッシュする（起動のたびに smoothscale しない）
+        scaled_title = asset_cache.scaled_image('assets/title.png', title_image, (new_w, new_h))
+
+        # 画像を中央やや上に配置し、スタート文は画像の下に表示
+        title_rect = scaled_title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
+        surface.blit(scaled_title, title_rect)
+    title_cache["size"] = size
+    title_cache["surface"] = surface
+    return surface
+
+
+
+def apply_loaded_assets():
+    """読み終わった画像・効果音を使い始める。全部読み終わったら True"""
+    global bg_image, bg_width, bg_height, title_image, title_loaded, assets_ready
+    if not title_loaded and asset_loader.has("title"):
+        title_loaded = True
+        title_image = asset_loader.result("title")
+        if title_image is not None:
+            title_cache["size"] = None  # 画像付きで合成し直す
+    if not asset_loader.ready:
+        return False
+    startup_timer.event("assets loaded")
+    bg_image = asset_loader.result("background")
+    if bg_image is not None:
+        bg_width = bg_image.get_width()
+        bg_height = bg_image.get_height()
+    for name, sound in asset_loader.result("sounds", {}).items():
+        sound_effects.set_sound(name, sound)
+    # 読み込み中に作ったプレイヤー・敵・ゴールに画像を付ける
+    player.load_images()
+    Enemy.reload_images(enemies)
+    goal.load_images()
+    assets_ready = True
+    return True
+
+
+def draw_loading(surface):
+    """タイトル画面の下に読み込みの進み具合のバーを描く"""
+    width = SCREEN_WIDTH // 3
+    bar = pygame.Rect((SCREEN_WIDTH - width) // 2, SCREEN_HEIGHT - 60, width, 10)
+    pygame.draw.rect(surface, (200, 200, 200), bar)
+    pygame.draw.rect(surface, (80, 80, 80), (bar.x, bar.y, int(bar.width * asset_loader.progress), bar.height))
+    label = text_cache.render(font, f"Loading... {asset_loader.done}/{asset_loader.total}", True, (80, 80, 80))
+    surface.blit(label, label.get_rect(midbottom=(bar.centerx, bar.y - 4)))
+
 
 # =========================
 # プレイヤー
 # =========================
-# GRAVITY = config['physics']['gravity']  # 削除
-player = Player(PLAYER_X, GROUND_Y, config)
+# 物理パラメータは config['physics'] と同期した PhysicsParams から読む（set_config もここを通す）
+physics = PhysicsParams(config)
+if tracer.enabled:
+    physics.subscribe(lambda name, value: tracer.instant(f"physics.{name}", args={"value": value}))
+player = Player(PLAYER_X, GROUND_Y, config, physics)
 
 # ゲーム状態
 game_over = False
 game_clear = False
 game_started = False  # タイトル画面の状態を追加
+start_requested = False  # タイトル画面でスペースキーが押された（読み込みが終わったら始める）
 
-# オーバーレイ描画リスト
-overlay_drawings = []
+# オーバーレイ描画（overlay.py。残す図形は上限を超えたら古いものから捨てる）
+overlay = OverlayLayer(max_items=config.get('performance', {}).get('overlay_max_items', 2000))
 
 
 # 敵との衝突判定設定（APIで変更可能）
@@ -134,18 +281,49 @@ CAMERA_FOLLOW_MAX = 40.0   # 追従速度の上限
 # =========================
 # 敵を複数配置
 # =========================
-enemies = [
-    Enemy(world_x=e['world_x'], 
-          y=GROUND_Y - e.get('y_offset', 0), 
-          move_range=e['move_range'], speed=e['speed'],
-          width=e['width'], height=e['height'],
-          scale=e.get('scale', 1.0),
-          use_gravity=e.get('use_gravity', True),
-          stomp_kills_enemy=e.get('stomp_kills_enemy', True),
-          touch_kills_player=e.get('touch_kills_player', True),
-          bounce_on_stomp=e.get('bounce_on_stomp', True))
-    for e in config['enemies']
-]
+# performance.vectorized_enemies が有効で NumPy があれば、敵の更新を配列でまとめて行う
+if config.get('performance', {}).get('vectorized_enemies', False):
+    if enemy_batch_available():
+        enemy_batch = EnemyBatch()
+    else:
+        print("numpy is not installed; falling back to per-enemy updates")
+        enemy_batch = None
+else:
+    enemy_batch = None
+
+
+def new_enemy(**kwargs):
+    """敵のインスタンスを新しく作る（一括更新が有効なら配列のスロットを割り当てる）"""
+    if enemy_batch is not None:
+        return BatchedEnemy(enemy_batch, **kwargs)
+    return Enemy(**kwargs)
+
+
+# 倒された・画面外に落ちた敵は捨てずに取っておき、次の生成で再利用する
+enemy_pool = EnemyPool(new_enemy, max_size=config.get('performance', {}).get('enemy_pool_size', 512))
+
+
+def make_enemy(**kwargs):
+    """敵を 1 体生成する（プールに空きがあれば再利用する）"""
+    return enemy_pool.acquire(**kwargs)
+
+
+# config['enemies'] のどのエントリからどの敵を作ったかを覚えておき、差分で反映する（level_sync.py）
+enemy_sync = EnemySync(make_enemy)
+
+
+def build_enemies(entries):
+    """config['enemies'] 形式のリストから敵を生成する"""
+    return enemy_sync.build(entries, GROUND_Y)
+
+
+# 取り除いた敵（踏まれた・落ちた・作り直した）はプールに戻る
+enemies = EntityList(build_enemies(config['enemies']), on_remove=enemy_pool.release)
+enemy_collider = EnemyCollider()
+
+# フレーム時間に応じて画面外の敵の更新を止める・生成を断る（entity_budget.py）
+entity_budget = EntityBudget.from_config(config, FPS)
+active_range = None  # このフレームで物理更新する敵の x 範囲（None なら全員）
 
 # =========================
 # レベル（足場・地面・ゴール）をロード
@@ -153,9 +331,35 @@ enemies = [
 platforms, goal = load_level(config, GROUND_Y)
 cliffs = config.get('cliffs', [])
 
+# 動かない地形（地面・崖・止まっている足場）はチャンクごとに描いておき、近くの足場だけ判定する（world_chunks.py）
+world = WorldChunks(chunk_width=config.get('performance', {}).get('chunk_width', 512))
+
+
+def refresh_world():
+    """足場・崖・地面が変わったら呼ぶ"""
+    world.invalidate(platforms, cliffs, GROUND_Y, SCREEN_HEIGHT, config['ground']['color'])
+
+
+refresh_world()
+startup_timer.mark("entities and level")
+
 # =========================
 # 状態スナップショット関数
 # =========================
+def state_range():
+    """performance.state_excludes_sleeping なら眠っている敵を state から外す"""
+    if config.get('performance', {}).get('state_excludes_sleeping', False):
+        return active_range
+    return None
+
+
+def state_enemies():
+    x_range = state_range()
+    if x_range is None:
+        return enemies
+    return [e for e in enemies if x_range[0] <= e.world_x <= x_range[1]]
+
+
 def make_state():
     return {
         "player": {
@@ -166,23 +370,12 @@ def make_state():
             "on_ground": not player.is_jumping,
         },
         "world": {
-            "time_ms": pygame.time.get_ticks(),
+            "time_ms": input_source.ticks(),
             "camera_x": camera_x,
-            "gravity": config['physics']['gravity'],
+            "gravity": physics.gravity,
         },
-        "enemies": [
-            {
-                "id": e.id,
-                "x": e.world_x,
-                "y": e.y,
-                "use_gravity": e.use_gravity,
-                "speed": getattr(e, 'speed', None),
-                "move_range": getattr(e, 'move_range', None),
-                "width": getattr(e, 'width', None),
-                "height": getattr(e, 'height', None),
-                "scale": getattr(e, 'scale', None),
-            }
-            for e in enemies
+        "enemies": enemy_batch.snapshot(enemies, state_range()) if enemy_batch is not None else [
+            e.to_state() for e in state_enemies()
         ],
         "goal": {"x": goal.world_x, "y": goal.y},
         "platforms": [
@@ -228,22 +421,25 @@ class CustomConnection:
         self.conn.setblocking(False)
 
     def restart(self):
-        if self.proc and self.proc.poll() is None:
-            self.proc.kill()
-        if self.conn:
-            self.conn.close()
-        if self.server_sock:
-            self.server_sock.close()
-        self.conn = None
-        self.server_sock = None
-        self.start()
-
-    def send_state(self, state):
+        with tracer.span("restart", cat="ipc"):
+            if self.proc and self.proc.poll() is None:
+                self.proc.kill()
+            if self.conn:
+                self.conn.close()
+            if self.server_sock:
+                self.server_sock.close()
+            self.conn = None
+            self.server_sock = None
+            self.start()
+
+    def send_state(self, state, frame=None):
         if not self.conn:
             return
         try:
-            msg = json.dumps({"type": "tick", "state": state}) + "\n"
+            msg = json.dumps({"type": "tick", "frame": frame, "state": state}) + "\n"
             self.conn.sendall(msg.encode("utf-8"))
+            if tracer.enabled:
+                tracer.flow("s", frame)
         except OSError:
             print("send failed, restarting custom_runner")
             self.restart()
@@ -271,6 +467,12 @@ class CustomConnection:
             except json.JSONDecodeError:
                 continue
             if msg.get("type") == "commands":
+                if tracer.enabled:
+                    # custom_runner 側のスパンを取り込み、どのフレームへの応答かを記録
+                    tracer.extend(msg.get("trace", []), "custom_runner")
+                    if msg.get("frame") is not None:
+                        tracer.flow("f", msg["frame"])
+                        tracer.instant("commands_received", {"frame": msg["frame"], "count": len(msg.get("commands", []))}, cat="ipc")
                 for c in msg.get("commands", []):
                     yield c
 
@@ -280,6 +482,82 @@ class CustomConnection:
 def clamp(v, lo, hi):
     return max(lo, min(hi, v))
 
+def write_config(key, val):
+    """config の key に val を書き、軽い反映はその場で行う。
+    足場・敵・ゴール・画面の作り直しが必要なら rebuild_from_config に渡す名前を返す"""
+    global cliffs, FPS, BG_WIDTH
+    keys = key.split(".")
+    # physics.* は範囲に丸めて PhysicsParams と config の両方に書く
+    if len(keys) == 2 and keys[0] == "physics" and physics.set(keys[1], val):
+        return None
+    cur = config
+    for k in keys[:-1]:
+        if k not in cur or not isinstance(cur[k], dict):
+            cur[k] = {}
+        cur = cur[k]
+    cur[keys[-1]] = val
+
+    # --- 動的な反映処理 ---
+    if key == "physics":
+        physics.load()
+    elif key in ("enemies", "platforms", "goal"):
+        return key
+    elif key.startswith("goal."):
+        # ゴールのプロパティが変更された場合も再ロード
+        return "goal"
+    elif key == "cliffs":
+        cliffs = val
+        return "world"
+    elif key == "ground.y_offset":
+        return "ground"
+    elif key == "ground" or key.startswith("ground."):
+        # 地面の色など。地形のチャンクを描き直す
+        return "world"
+    elif key in ("screen.width", "screen.height"):
+        return "screen"
+    elif key == "screen.fps":
+        FPS = val
+    elif key.startswith("player."):
+        if key == "player.width": player.width = val
+        elif key == "player.height": player.height = val
+        elif key == "player.x": player.x_screen = val
+        elif key == "player.color": player.color = tuple(val)
+        elif key == "player.scale": player.set_scale(float(val))
+    elif key.startswith("enemy."):
+        parts = key.split(".")
+        if len(parts) == 3 and parts[1].isdigit():
+            idx = int(parts[1])
+            prop = parts[2]
+            if 0 <= idx < len(enemies):
+                if prop == "scale":
+                    enemies[idx].set_scale(float(val))
+    elif key.startswith("background."):
+        if key == "background.tile_width":
+            BG_WIDTH = val
+    return None
+
+
+def rebuild_from_config(rebuilds):
+    """write_config が返した名前の集合について、config から作り直す（各 1 回）"""
+    global goal, SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_Y
+    if "screen" in rebuilds:
+        SCREEN_WIDTH = config['screen']['width']
+        SCREEN_HEIGHT = config['screen']['height']
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    if "ground" in rebuilds:
+        GROUND_Y = SCREEN_HEIGHT - config['ground']['y_offset']
+    # 敵と足場は作り直さず、今あるものとの差分だけ反映する
+    if "enemies" in rebuilds:
+        enemy_sync.sync(enemies, config['enemies'], GROUND_Y)
+    # 地面が変わったら足場とゴールも再配置
+    if rebuilds & {"platforms", "ground"}:
+        sync_platforms(platforms, config['platforms'], GROUND_Y)
+    if rebuilds & {"goal", "ground"}:
+        _, goal = load_level(config, GROUND_Y)
+    if rebuilds & {"platforms", "ground", "screen", "world"}:
+        refresh_world()
+
+
 def apply_command(cmd):
     global config, display_text, display_text_timer, display_text_color
     global enemies, platforms, goal, cliffs, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, GROUND_Y, BG_WIDTH
@@ -293,85 +571,33 @@ def apply_command(cmd):
         # custom_runner 側で set_config に変換しているはずだが、念のため
         key = cmd.get("key")
         val = cmd.get("value")
-        if key == "gravity":
-            config['physics']['gravity'] = clamp(float(val), -5.0, 5.0)
-        elif key == "max_speed":
-            config['physics']['max_speed'] = clamp(float(val), 0.5, 30.0)
+        if key in ("gravity", "max_speed"):
+            physics.set(key, val)
 
     elif op == "set_config":
-        key = cmd.get("key", "")
-        val = cmd.get("value")
-        keys = key.split(".")
-        cur = config
-        for k in keys[:-1]:
-            if k not in cur or not isinstance(cur[k], dict):
-                cur[k] = {}
-            cur = cur[k]
-        cur[keys[-1]] = val
-
-        # --- 動的な反映処理 ---
-        if key == "enemies":
-            enemies.clear()
-            enemies.extend([
-                Enemy(world_x=e['world_x'], 
-                      y=GROUND_Y - e.get('y_offset', 0), 
-                      move_range=e['move_range'], speed=e['speed'],
-                      width=e['width'], height=e['height'],
-                      scale=e.get('scale', 1.0),
-                      use_gravity=e.get('use_gravity', True),
-                      stomp_kills_enemy=e.get('stomp_kills_enemy', True),
-                      touch_kills_player=e.get('touch_kills_player', True),
-                      bounce_on_stomp=e.get('bounce_on_stomp', True))
-                for e in val
-            ])
-        elif key == "platforms":
-            new_platforms, _ = load_level(config, GROUND_Y)
-            platforms.clear()
-            platforms.extend(new_platforms)
-        elif key == "goal":
-            _, new_goal = load_level(config, GROUND_Y)
-            goal = new_goal
-        elif key.startswith("goal."):
-            # ゴールのプロパティが変更された場合も再ロード
-            _, new_goal = load_level(config, GROUND_Y)
-            goal = new_goal
-        elif key == "cliffs":
-            cliffs = val
-        elif key == "ground.y_offset":
-            GROUND_Y = SCREEN_HEIGHT - val
-            # 地面が変わったら足場とゴールも再配置
-            new_platforms, new_goal = load_level(config, GROUND_Y)
-            platforms.clear()
-            platforms.extend(new_platforms)
-            goal = new_goal
-        elif key == "screen.width":
-            SCREEN_WIDTH = val
-            pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        elif key == "screen.height":
-            SCREEN_HEIGHT = val
-            pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        elif key == "screen.fps":
-            FPS = val
-        elif key.startswith("player."):
-            if key == "player.width": player.width = val
-            elif key == "player.height": player.height = val
-            elif key == "player.x": player.x_screen = val
-            elif key == "player.color": player.color = tuple(val)
-            elif key == "player.scale": player.set_scale(float(val))
-        elif key.startswith("enemy."):
-            parts = key.split(".")
-            if len(parts) == 3 and parts[1].isdigit():
-                idx = int(parts[1])
-                prop = parts[2]
-                if 0 <= idx < len(enemies):
-                    if prop == "scale":
-                        enemies[idx].set_scale(float(val))
-        elif key.startswith("background."):
-            if key == "background.tile_width":
-                BG_WIDTH = val
+        rebuild = write_config(cmd.get("key", ""), cmd.get("value"))
+        if rebuild:
+            rebuild_from_config({rebuild})
+
+    elif op == "set_config_batch":
+        # 全キーを書き込んでから、必要な再構築をそれぞれ 1 回だけ行う
+        values = cmd.get("values")
+        if not isinstance(values, dict):
+            return
+        rebuilds = set()
+        for key, val in values.items():
+            if "enemies" in rebuilds and key.startswith("enemy."):
+                # enemy.N.* は今いる敵に直接書くので、先に来た enemies をここで反映しておく
+                # （set_config を 1 つずつ送ったときと同じ結果にする。後に来た enemies は最後にまとめて反映）
+                rebuild_from_config(rebuilds)
+                rebuilds.clear()
+            rebuild = write_config(key, val)
+            if rebuild:
+                rebuilds.add(rebuild)
+        rebuild_from_config(rebuilds)
 
     elif op == "spawn_enemy":
-        if len(enemies) >= 30:
+        if not entity_budget.can_spawn(len(enemies)):
             return
         x = float(cmd.get("x", camera_x + 800))
         y = float(cmd.get("y", GROUND_Y))
@@ -386,14 +612,14 @@ def apply_command(cmd):
         bounce_on_stomp = bool(cmd.get("bounce_on_stomp", True))
         print(f"[DEBUG] spawn_enemy cmd: x={x}, y={y}, speed={speed}, scale={scale}, use_gravity={use_gravity}, move_range={move_range}, width={width}, height={height}")
         enemies.append(
-            Enemy(world_x=x, y=y, move_range=move_range, speed=speed,
-                  width=width, height=height, scale=scale, use_gravity=use_gravity,
-                  stomp_kills_enemy=stomp_kills_enemy, touch_kills_player=touch_kills_player,
-                  bounce_on_stomp=bounce_on_stomp)
+            make_enemy(world_x=x, y=y, move_range=move_range, speed=speed,
+                       width=width, height=height, scale=scale, use_gravity=use_gravity,
+                       stomp_kills_enemy=stomp_kills_enemy, touch_kills_player=touch_kills_player,
+                       bounce_on_stomp=bounce_on_stomp)
         )
 
     elif op == "spawn_snake":
-        if len(enemies) >= 30:
+        if not entity_budget.can_spawn(len(enemies)):
             return
         x = float(cmd.get("x", camera_x + 800))
         y = float(cmd.get("y", 300))
@@ -405,10 +631,10 @@ def apply_command(cmd):
         stomp_kills_enemy = bool(cmd.get("stomp_kills_enemy", True))
         touch_kills_player = bool(cmd.get("touch_kills_player", True))
         bounce_on_stomp = bool(cmd.get("bounce_on_stomp", True))
-        snake = Enemy(world_x=x, y=y, move_range=move_range, speed=speed,
-                     width=width, height=height, scale=scale, use_gravity=False,
-                     stomp_kills_enemy=stomp_kills_enemy, touch_kills_player=touch_kills_player,
-                     bounce_on_stomp=bounce_on_stomp)
+        snake = make_enemy(world_x=x, y=y, move_range=move_range, speed=speed,
+                           width=width, height=height, scale=scale, use_gravity=False,
+                           stomp_kills_enemy=stomp_kills_enemy, touch_kills_player=touch_kills_player,
+                           bounce_on_stomp=bounce_on_stomp)
         snake.color = (0, 200, 0)  # 緑色で蛇らしく
         enemies.append(snake)
 
@@ -439,14 +665,13 @@ def apply_command(cmd):
         elif vy is not None:
             vy = clamp(vy, -MAX_V, MAX_V)
 
-        for e in enemies:
-            if e.id == eid:
-                e.use_api_control = True
-                if vx is not None:
-                    e.vx = vx
-                if vy is not None:
-                    e.vy = vy
-                break
+        e = enemies.get(eid)
+        if e is not None:
+            e.use_api_control = True
+            if vx is not None:
+                e.vx = vx
+            if vy is not None:
+                e.vy = vy
 
     elif op == "set_enemy_scale":
         eid = cmd.get("id")
@@ -461,11 +686,13 @@ def apply_command(cmd):
         except (TypeError, ValueError):
             return
 
-        for e in enemies:
-            if target_all or e.id == eid:
+        if target_all:
+            for e in enemies:
+                e.set_scale(scale_value)
+        else:
+            e = enemies.get(eid)
+            if e is not None:
                 e.set_scale(scale_value)
-                if not target_all:
-                    break
 
     elif op == "set_enemy_pos":
         eid = cmd.get("id")
@@ -476,26 +703,23 @@ def apply_command(cmd):
         if x is None and y is None:
             return
 
-        for e in enemies:
-            if e.id == eid:
-                if x is not None:
-                    new_x = float(x)
-                    e.world_x = new_x
-                    e.center_x = new_x  # keep patrol origin in sync
-                if y is not None:
-                    e.y = float(y)
-                    if e.use_gravity:
-                        e.vy = 0
-                break
+        e = enemies.get(eid)
+        if e is not None:
+            if x is not None:
+                new_x = float(x)
+                e.world_x = new_x
+                e.center_x = new_x  # keep patrol origin in sync
+            if y is not None:
+                e.y = float(y)
+                if e.use_gravity:
+                    e.vy = 0
 
     elif op == "enemy_jump":
         eid = cmd.get("id")
         jump_strength = -15
-        for e in enemies:
-            if e.id == eid:
-                if e.y >= GROUND_Y:
-                    e.vy = jump_strength
-                break
+        e = enemies.get(eid)
+        if e is not None and e.y >= GROUND_Y:
+            e.vy = jump_strength
 
     elif op == "set_player_pos":
         x = cmd.get("x")
@@ -511,7 +735,7 @@ def apply_command(cmd):
         vy = cmd.get("vy")
         limit = bool(cmd.get("limit", False))
         if vx is not None:
-            max_spd = max(0.0, float(config['physics']['max_speed']))
+            max_spd = physics.max_speed
             if limit:
                 camera_vx = clamp(float(vx), -max_spd, max_spd)
             else:
@@ -551,12 +775,18 @@ def apply_command(cmd):
         vx = float(cmd.get("vx", 0.0))
         vy = float(cmd.get("vy", 0.0))
         if 0 <= idx < len(platforms):
+            was_moving = platforms[idx].move_enabled
             platforms[idx].set_velocity(vx, vy)
+            if not was_moving:
+                refresh_world()  # 動き始めた足場はチャンクから外して毎フレーム描く（速度を変えただけなら不要）
 
     elif op == "stop_platform":
         idx = int(cmd.get("index", -1))
         if 0 <= idx < len(platforms):
+            was_moving = platforms[idx].move_enabled
             platforms[idx].stop()
+            if was_moving:
+                refresh_world()  # 止まった位置でチャンクに描き直す
 
     elif op == "show_text":
         text = cmd.get("text", "")
@@ -589,28 +819,30 @@ def apply_command(cmd):
             print(trace)
 
     elif op == "draw_circle":
+        persistent = bool(cmd.get("persistent", True))
         x = cmd.get("x", 0)
         y = cmd.get("y", 0)
         radius = cmd.get("radius", 10)
         color = tuple(cmd.get("color", [255, 255, 255]))
         width = cmd.get("width", 0)
-        overlay_drawings.append({
+        overlay.add({
             "type": "circle",
             "x": x,
             "y": y,
             "radius": radius,
             "color": color,
             "width": width,
-        })
+        }, persistent)
 
     elif op == "draw_rect":
+        persistent = bool(cmd.get("persistent", True))
         x = cmd.get("x", 0)
         y = cmd.get("y", 0)
         width = cmd.get("width", 10)
         height = cmd.get("height", 10)
         color = tuple(cmd.get("color", [255, 255, 255]))
         line_width = cmd.get("line_width", 0)
-        overlay_drawings.append({
+        overlay.add({
             "type": "rect",
             "x": x,
             "y": y,
@@ -618,16 +850,17 @@ def apply_command(cmd):
             "height": height,
             "color": color,
             "line_width": line_width,
-        })
+        }, persistent)
 
     elif op == "draw_line":
+        persistent = bool(cmd.get("persistent", True))
         start_x = cmd.get("start_x", 0)
         start_y = cmd.get("start_y", 0)
         end_x = cmd.get("end_x", 0)
         end_y = cmd.get("end_y", 0)
         color = tuple(cmd.get("color", [255, 255, 255]))
         width = cmd.get("width", 1)
-        overlay_drawings.append({
+        overlay.add({
             "type": "line",
             "start_x": start_x,
             "start_y": start_y,
@@ -635,12 +868,13 @@ def apply_command(cmd):
             "end_y": end_y,
             "color": color,
             "width": width,
-        })
+        }, persistent)
 
     elif op == "clear_overlay":
-        overlay_drawings.clear()
+        overlay.clear()
 
     elif op == "draw_enemy_overlay":
+        persistent = bool(cmd.get("persistent", True))
         enemy_id = cmd.get("enemy_id")
         shape = cmd.get("shape", "rect")
         color = tuple(cmd.get("color", [255, 0, 0]))
@@ -651,11 +885,8 @@ def apply_command(cmd):
         target_enemies = []
         if enemy_id == "all":
             target_enemies = enemies
-        else:
-            for e in enemies:
-                if e.id == enemy_id:
-                    target_enemies.append(e)
-                    break
+        elif enemies.get(enemy_id) is not None:
+            target_enemies.append(enemies.get(enemy_id))
         
         # 各敵にオーバーレイを描画
         for e in target_enemies:
@@ -663,16 +894,16 @@ def apply_command(cmd):
             ey = int(e.y - e.height // 2)
             
             if shape == "circle":
-                overlay_drawings.append({
+                overlay.add({
                     "type": "circle",
                     "x": ex,
                     "y": ey,
                     "radius": size,
                     "color": color,
                     "width": line_width,
-                })
+                }, persistent)
             else:  # rect
-                overlay_drawings.append({
+                overlay.add({
                     "type": "rect",
                     "x": ex - size // 2,
                     "y": ey - size // 2,
@@ -680,7 +911,7 @@ def apply_command(cmd):
                     "height": size,
                     "color": color,
                     "line_width": line_width,
-                })
+                }, persistent)
 
     elif op == "set_enemy_collision":
         key = cmd.get("key")
@@ -704,6 +935,7 @@ def reset_game():
             config.update(new_config)
     except Exception as e:
         print(f"Failed to reload config: {e}")
+    physics.load()
     
     game_over = False
     game_clear = False
@@ -715,18 +947,7 @@ def reset_game():
     
     # 敵を再生成
     enemies.clear()
-    enemies.extend([
-        Enemy(world_x=e['world_x'], 
-              y=GROUND_Y - e.get('y_offset', 0), 
-              move_range=e['move_range'], speed=e['speed'],
-              width=e['width'], height=e['height'],
-              scale=e.get('scale', 1.0),
-              use_gravity=e.get('use_gravity', True),
-              stomp_kills_enemy=e.get('stomp_kills_enemy', True),
-              touch_kills_player=e.get('touch_kills_player', True),
-              bounce_on_stomp=e.get('bounce_on_stomp', True))
-        for e in config['enemies']
-    ])
+    enemies.extend(build_enemies(config['enemies']))
     
     # 足場とゴールを再生成
     new_platforms, new_goal = load_level(config, GROUND_Y)
@@ -736,6 +957,7 @@ def reset_game():
     
     # 崖情報を更新
     cliffs = config.get('cliffs', [])
+    refresh_world()
     
     # AIステータステキストをクリア
     ai_status_text = None
@@ -743,7 +965,7 @@ def reset_game():
     prompt_flag_shown = False
     
     # オーバーレイをクリア
-    overlay_drawings.clear()
+    overlay.clear()
     
     # 敵との衝突判定設定をリセット
     enemy_collision_config["stomp_kills_enemy"] = True
@@ -754,11 +976,44 @@ def reset_game():
     custom_conn.restart()
     print("Game Reset!")
 
+# =========================
+# 入力ソース（通常 / 記録 / 再生）
+# =========================
+if cli_args.replay:
+    input_source = InputReplay(cli_args.replay)
+    seed = input_source.seed
+elif cli_args.record:
+    seed = cli_args.seed if cli_args.seed is not None else random.randrange(2 ** 31)
+    input_source = InputRecorder(cli_args.record, seed, FPS)
+else:
+    seed = cli_args.seed
+    input_source = LiveInput()
+atexit.register(input_source.close)
+
+if seed is not None:
+    random.seed(seed)
+    os.environ["VIBE_SEED"] = str(seed)  # custom_runner の RemoteAPI.rand も同じ系列にする
+
+# 記録・再生ではゲームを始めるフレームが読み込みの速さで変わらないよう、ここで読み終わるのを待つ
+startup_timer.mark("input source")
+if cli_args.record or cli_args.replay:
+    asset_loader.wait()
+    apply_loaded_assets()
+    startup_timer.mark("wait for assets")
+
+# 再生をヘッドレスで行う場合はフレームレート制限なしで回す
+unthrottled = bool(cli_args.replay and cli_args.headless)
+TITLE_FPS = config.get('performance', {}).get('title_fps', 15)
+
 # =========================
 # TCP接続を初期化
 # =========================
-custom_conn = CustomConnection()
+if input_source.replaying:
+    custom_conn = ReplayConnection(input_source)
+else:
+    custom_conn = CustomConnection()
 custom_conn.start()
+startup_timer.mark("custom_runner start")
 
 # =========================
 # リロードフラグのチェック用
@@ -766,39 +1021,64 @@ custom_conn.start()
 last_reload_check = 0
 RELOAD_INTERVAL_MS = 500  # 0.5秒に1回で十分
 
+# =========================
+# フレームプロファイラ（F3 で HUD 表示）
+# =========================
+profiler = FrameProfiler(tracer=tracer)
+
+
+def write_profile_summary():
+    summary = profiler.summary()
+    summary["enemies"] = len(enemies)
+    with open(cli_args.profile_out, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+
+if cli_args.profile_out:
+    atexit.register(write_profile_summary)
+
 # =========================
 # メインループ
 # =========================
+startup_timer.mark("setup")
 running = True
 while running:
-    dt = clock.tick(FPS)  # ミリ秒
+    # タイトル画面では入力を待つだけなので低いフレームレートで回す
+    dt = clock.tick(0 if unthrottled else (FPS if game_started else TITLE_FPS))  # ミリ秒
+    profiler.start_frame()
     
-    # リロードフラグのチェック
+    # リロードフラグのチェック（再生中はファイルを見ない）
     now = pygame.time.get_ticks()
-    if now - last_reload_check > RELOAD_INTERVAL_MS:
+    if not input_source.replaying and now - last_reload_check > RELOAD_INTERVAL_MS:
         last_reload_check = now
         if os.path.exists("reload.flag"):
             os.remove("reload.flag")
             custom_conn.restart()   # custom_runner を再起動 → 新しい script_user.py がimportされる
+    profiler.mark("flags")
     # =========================
     # イベント処理
     # =========================
-    for event in pygame.event.get():
+    for event in input_source.begin_frame():
         if event.type == pygame.QUIT:
             running = False
-        # タイトル画面中はスペースキーでゲーム開始
+        # F3 でプロファイラ HUD の表示切り替え
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profiler.toggle()
+        # タイトル画面中はスペースキーでゲーム開始（読み込み中に押したら、読み終わったところで始める）
         if not game_started:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    game_started = True
+                    if assets_ready:
+                        game_started = True
+                    else:
+                        start_requested = True
         else:
             # スペースキーでジャンプ開始
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     # ジャンプ可能な場合のみSEを再生
                     if player.jump_count < player.max_jumps:
-                        if jump_sound:
-                            jump_sound.play()
+                        sound_effects.play("jump")
                     player.start_jump()
                 # R キーでリセット
                 if event.key == pygame.K_r:
@@ -807,14 +1087,21 @@ while running:
             if event.type == pygame.KEYUP:
                 if event.key == pygame.K_SPACE:
                     player.release_jump()
+    if not assets_ready and apply_loaded_assets() and start_requested:
+        game_started = True
+    if assets_ready and not startup_timer.finished:
+        startup_timer.finish(startup_log)
+    # 負荷レベル（記録・再生時はフレームごとのレベルも記録・再生する）
+    entity_budget.level = input_source.budget_level(entity_budget.level)
+    profiler.mark("events")
 
     # =========================
     # AIステータスチェック（0.5秒に1回）
     # =========================
     current_time = pygame.time.get_ticks()
     
-    # コード生成中フラグをチェック
-    if current_time - last_generating_check > 500:
+    # コード生成中フラグをチェック（再生中はファイルを見ない）
+    if not input_source.replaying and current_time - last_generating_check > 500:
         last_generating_check = current_time
         if os.path.exists("status_generating.flag"):
             try:
@@ -842,17 +1129,18 @@ while running:
                 if ai_status_timer == 0:
                     ai_status_text = None
                     prompt_flag_shown = False
+    profiler.mark("flags")
     
     # =========================
     # 入力処理
     # =========================
     if not game_over and not game_clear and game_started:
-        keys = pygame.key.get_pressed()
+        keys = input_source.pressed()
         
-        # 慣性を使った横移動（configから毎フレーム取得）
-        accel = config['physics']['acceleration']
-        decel = config['physics']['deceleration']
-        max_spd = config['physics']['max_speed']
+        # 慣性を使った横移動（PhysicsParams から毎フレーム取得）
+        accel = physics.acceleration
+        decel = physics.deceleration
+        max_spd = physics.max_speed
 
         if keys[pygame.K_RIGHT]:
             camera_vx += accel
@@ -889,16 +1177,17 @@ while running:
                 # 距離を元に補間速度を決める（遠いほど大きく）
                 follow_vx = clamp(dx * CAMERA_FOLLOW_GAIN, -CAMERA_FOLLOW_MAX, CAMERA_FOLLOW_MAX)
                 camera_x += follow_vx
+    profiler.mark("input")
 
     # タイトル画面中またはゲーム終了後は更新処理をスキップ
     if game_started and not game_over and not game_clear:
         # =========================
         # 足場の更新
         # =========================
-        platform_moves = {}  # 各足場の移動量を記録
-        for i, platform in enumerate(platforms):
-            dy = platform.update()
-            platform_moves[i] = dy
+        platform_moves = {}  # 各足場の移動量を記録（止まっている足場は 0）
+        for i in world.moving:
+            platform_moves[i] = platforms[i].update()
+        profiler.mark("platforms")
 
         # =========================
         # プレイヤーの物理演算（ジャンプ）
@@ -911,7 +1200,9 @@ while running:
         player_rect = player.get_rect()
         player_on_platform = None  # プレイヤーが乗っている足場
         
-        for i, platform in enumerate(platforms):
+        # プレイヤーの近くのチャンクにかかる足場だけ調べる（番号の小さい順なので結果は全部調べたときと同じ）
+        for i in world.platforms_near(camera_x + player_rect.left - 1, camera_x + player_rect.right + 1):
+            platform = platforms[i]
             platform_rect = platform.get_rect(camera_x)
             
             # X軸の重なり判定
@@ -935,28 +1226,46 @@ while running:
         # 地面判定（崖でない場所のみ）
         player_world_x = camera_x + player.x_screen
         if player.y >= GROUND_Y - player.height and player.vy > 0:
-            if is_on_ground(player_world_x, cliffs):
+            if world.on_ground(player_world_x):
                 # 地面がある場所に着地
                 player.land_on(GROUND_Y)
             # 地面がない場所（崖）では着地しない
                     
         # プレイヤーが足場に乗っている場合、足場の移動に追従
         if player_on_platform is not None:
-            dy = platform_moves[player_on_platform]
+            dy = platform_moves.get(player_on_platform, 0)
             if dy != 0:
                 player.y += dy  # 足場の上下移動に追従
+        profiler.mark("player")
 
         # =========================
         # 更新処理
         # =========================
-        current_gravity = config['physics']['gravity']
-        for enemy in enemies:
-            enemy.update(platforms, GROUND_Y, current_gravity, lambda x: is_on_ground(x, cliffs))
+        current_gravity = physics.gravity
+        # 画面から遠い敵（と、負荷が高いときは画面外の敵）は眠らせて更新しない
+        active_range = entity_budget.update_range(camera_x, SCREEN_WIDTH)
+        if enemy_batch is not None:
+            enemy_batch.update(enemies, platforms, GROUND_Y, current_gravity, cliffs, active_range,
+                               world.platforms_near)
+        else:
+            for enemy in enemies:
+                if active_range is None or active_range[0] <= enemy.world_x <= active_range[1]:
+                    enemy.update(platforms, GROUND_Y, current_gravity, world.on_ground, world.platforms_near)
         
         # (state send will happen after collision detection so script_user gets up-to-date info)
 
-        # 画面外に落ちた敵を削除
-        enemies[:] = [e for e in enemies if e.y < SCREEN_HEIGHT + 100]
+        # 画面外に落ちた敵を削除する
+        # 当たり判定や state に 1 フレーム残らないよう、ここで取り除く（踏んだ敵だけコマンド適用後の flush まで残す）
+        fall_limit = SCREEN_HEIGHT + 100
+        if enemy_batch is not None:
+            fallen = enemy_batch.fallen(enemies, fall_limit)
+        else:
+            fallen = [i for i, e in enumerate(enemies) if e.y >= fall_limit]
+        if fallen:
+            for i in fallen:
+                enemies.remove_later(enemies[i])
+            enemies.flush()
+        profiler.mark("enemies")
 
         # =========================
         # 当たり判定
@@ -968,70 +1277,78 @@ while running:
         shoe_rect = player.get_shoe_rect()
         
         # 敵との衝突判定
-        enemies_to_remove = []
         enemy_bounced = False  # 敵を踏んだかどうか
         last_stomped_enemy = None  # 最後に踏んだ敵（バウンス設定用）
-        for enemy in enemies:
-            enemy_rect = enemy.get_rect(camera_x)
-            # 靴との当たり判定（敵が死ぬ）
-            if shoe_rect.colliderect(enemy_rect) and player.vy > 0:
-                stomped_enemies_this_frame.append(enemy.id)  # 踏んだ敵を記録
-                if enemy.stomp_kills_enemy:
-                    if enemy_dead_sound:
-                        enemy_dead_sound.play()
-                    enemies_to_remove.append(enemy)
-                enemy_bounced = True  # 敵を踏んだ
-                last_stomped_enemy = enemy
-            # プレイヤー本体との当たり判定（ゲームオーバー）
-            elif player_rect.colliderect(enemy_rect):
-                touched_enemies_this_frame.append(enemy.id)  # 触れた敵を記録
-                if enemy.touch_kills_player:
-                    if player_dead_sound:
-                        player_dead_sound.play()
-                    game_over = True
+        # 靴に当たった敵（落下中のみ）と、それ以外で本体に当たった敵をまとめて求める
+        stomped_idx, touched_idx = enemy_collider.hits(
+            enemies, camera_x, shoe_rect, player_rect, player.vy > 0, enemy_batch)
+        # 靴との当たり判定（敵が死ぬ）
+        for i in stomped_idx:
+            enemy = enemies[i]
+            stomped_enemies_this_frame.append(enemy.id)  # 踏んだ敵を記録
+            if enemy.stomp_kills_enemy:
+                sound_effects.play("enemy_dead")
+                enemies.remove_later(enemy)
+            enemy_bounced = True  # 敵を踏んだ
+            last_stomped_enemy = enemy
+        # プレイヤー本体との当たり判定（ゲームオーバー）
+        for i in touched_idx:
+            enemy = enemies[i]
+            touched_enemies_this_frame.append(enemy.id)  # 触れた敵を記録
+            if enemy.touch_kills_player:
+                sound_effects.play("player_dead")
+                game_over = True
+        profiler.mark("collision")
         
         # ---- script_user（TCP越し）を呼ぶ ----
         # 衝突判定が済んだら、まだ敵を削除する前に state を送る
         # こうすることで script_user 側は踏んだ敵のプロパティも参照できる
         state_dict = make_state()
-        custom_conn.send_state(state_dict)
-        for cmd in custom_conn.poll_commands():
-            apply_command(cmd)
+        input_source.check_state(state_dict)
+        custom_conn.send_state(state_dict, frame=profiler.frame_count)
+        profiler.mark("send_state")
+        overlay.begin_frame()  # 前のフレームだけの図形を消す
+        for cmd in input_source.commands(custom_conn):
+            if tracer.enabled:
+                cmd_start = tracer.now()
+                apply_command(cmd)
+                tracer.complete(f"apply:{cmd.get('op')}", cmd_start, args={"frame": profiler.frame_count}, cat="command")
+            else:
+                apply_command(cmd)
+        profiler.mark("commands")
 
-        # 敵を削除（runner にコマンドが反映された後に削除）
-        for enemy in enemies_to_remove:
-            enemies.remove(enemy)
+        # 敵を削除（runner にコマンドが反映された後に、このフレームの分をまとめて削除）
+        enemies.flush()
 
         # 敵を踏んだ場合のジャンプ処理
         if enemy_bounced and last_stomped_enemy and last_stomped_enemy.bounce_on_stomp:
-            keys = pygame.key.get_pressed()
+            keys = input_source.pressed()
             player.stomp_enemy(keys[pygame.K_SPACE])
 
         # ゴール判定
         goal_rect = goal.get_rect(camera_x)
         if player_rect.colliderect(goal_rect):
-            if clear_sound:
-                clear_sound.play()
+            sound_effects.play("clear")
             game_clear = True
 
         # 崖判定（プレイヤーが地面の範囲外で、足場にも乗っていない場合）
         player_world_x = camera_x + player.x_screen
-        if player.y >= GROUND_Y and not is_on_ground(player_world_x, cliffs) and player_on_platform is None:
-            if player_dead_sound:
-                player_dead_sound.play()
+        if player.y >= GROUND_Y and not world.on_ground(player_world_x) and player_on_platform is None:
+            sound_effects.play("player_dead")
             game_over = True
 
         # 上方向へ画面外に出たら死亡にする（例: 重力が0のときの無限上昇対策）
         # プレイヤーの下端が画面上端よりさらに一定量上に行ったらゲームオーバー
         if player.y + player.height < -100:
-            if player_dead_sound:
-                player_dead_sound.play()
+            sound_effects.play("player_dead")
             game_over = True
+        profiler.mark("collision")
     elif game_started:
         # ゲーム終了後、Rキーでリスタート
-        keys = pygame.key.get_pressed()
+        keys = input_source.pressed()
         if keys[pygame.K_r]:
             reset_game()
+        profiler.mark("input")
 
     # =========================
     # 描画
@@ -1039,161 +1356,126 @@ while running:
     
     # タイトル画面の描画
     if not game_started:
-
-        # 白背景で描画
-        screen.fill((255, 255, 255))
-        # タイトル画像をアスペクト比を保ってリサイズして描画
-        if title_image:
-            # 画面に対する最大サイズ（マージンを残す）
-            max_w = int(SCREEN_WIDTH * 1.35)
-            max_h = int(SCREEN_HEIGHT * 0.9)
-            iw, ih = title_image.get_size()
-            # scale <= 1.0 にして拡大しすぎないようにする（必要なら1.0を超える許可可）
-            scale = min(max_w / iw, max_h / ih)
-            new_w = max(1, int(iw * scale))
-            new_h = max(1, int(ih * scale))
-            try:
-                scaled_title = pygame.transform.smoothscale(title_image, (new_w, new_h))
-            except Exception:
-                scaled_title = pygame.transform.scale(title_image, (new_w, new_h))
-
-            # 画像を中央やや上に配置し、スタート文は画像の下に表示
-            title_rect = scaled_title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
-            screen.blit(scaled_title, title_rect)
-
-
-
-
-        pygame.display.flip()
+        # 合成済みのタイトル画面を貼る（dirty_rects が有効なら画面サイズか読み込みの進み具合が変わったときだけ）
+        loading = None if assets_ready else (title_image is not None, asset_loader.done)
+        if dirty_rects.begin(screen, ("title", SCREEN_WIDTH, SCREEN_HEIGHT, loading)):
+            screen.blit(title_screen(), (0, 0))
+            if not assets_ready:
+                draw_loading(screen)
+            dirty_rects.save_static(screen)
+        profiler.mark("background")
+
+        dirty_rects.add(profiler.draw(screen, FPS))
+        profiler.mark("hud")
+
+        dirty_rects.present()
+        profiler.mark("flip")
+        profiler.end_frame()
+        input_source.end_frame()
         continue  # ゲーム画面の描画をスキップ
     
-    # 背景画像のスクロール描画
-    if bg_image:
-        # カメラ位置に応じた背景のオフセットを計算（視差効果のため、少し遅めにスクロール）
-        bg_scroll_x = int(camera_x * 0.5) % bg_width
+    # 背景と地面はカメラや地面が変わったときだけ描き直す（dirty_rects が無効なら毎フレーム）
+    static_key = (camera_x, SCREEN_WIDTH, SCREEN_HEIGHT, BG_WIDTH, world.version,
+                  tuple(config['background']['color']))
+    if dirty_rects.begin(screen, static_key):
+        # 背景画像のスクロール描画
+        if bg_image:
+            # カメラ位置に応じた背景のオフセットを計算（視差効果のため、少し遅めにスクロール）
+            bg_scroll_x = int(camera_x * 0.5) % bg_width
         
-        # 画面を埋めるために必要な枚数を計算
-        num_tiles = (SCREEN_WIDTH // bg_width) + 2
+            # 画面を埋めるために必要な枚数を計算
+            num_tiles = (SCREEN_WIDTH // bg_width) + 2
         
-        for i in range(num_tiles):
-            x_pos = i * bg_width - bg_scroll_x
-            # 背景画像を縦に拡大して描画
-            scaled_bg = pygame.transform.scale(bg_image, (bg_width, SCREEN_HEIGHT))
-            screen.blit(scaled_bg, (x_pos, 0))
-    else:
-        # 背景画像が読み込めない場合は単色
-        screen.fill(tuple(config['background']['color']))
+            for i in range(num_tiles):
+                x_pos = i * bg_width - bg_scroll_x
+                # 背景画像を縦に拡大して描画
+                scaled_bg = pygame.transform.scale(bg_image, (bg_width, SCREEN_HEIGHT))
+                screen.blit(scaled_bg, (x_pos, 0))
+        else:
+            # 背景画像が読み込めない場合は単色
+            screen.fill(tuple(config['background']['color']))
+        profiler.mark("background")
 
-    # 地面（崖以外の部分を描画）
-    # 画面内に見える範囲を計算
-    view_start_x = camera_x
-    view_end_x = camera_x + SCREEN_WIDTH
-    
-    # 現在の描画開始位置
-    current_draw_x = view_start_x
-    
-    # 崖リストをソート（念のため）
-    sorted_cliffs = sorted(cliffs, key=lambda c: c['start_x'])
-    
-    # 画面内の崖を探して、それ以外の部分を描画
-    for cliff in sorted_cliffs:
-        cliff_start = cliff['start_x']
-        cliff_end = cliff['end_x']
-        
-        # 崖が現在の描画位置より右にある場合、そこまでを地面として描画
-        if cliff_start > current_draw_x:
-            # 描画範囲の終端（崖の始まり、または画面端）
-            draw_end_x = min(cliff_start, view_end_x)
-            
-            if draw_end_x > current_draw_x:
-                screen_x = int(current_draw_x - camera_x)
-                width = int(draw_end_x - current_draw_x)
-                
-                ground_rect = pygame.Rect(screen_x, GROUND_Y, width, SCREEN_HEIGHT - GROUND_Y)
-                pygame.draw.rect(screen, (255, 255, 255), ground_rect)
-                pygame.draw.rect(screen, tuple(config['ground']['color']), ground_rect, 3)
-        
-        # 現在位置を崖の終わりに進める（ただし、崖が画面より左で終わっている場合は現在位置を変えない）
-        if cliff_end > current_draw_x:
-            current_draw_x = cliff_end
-            
-        # 画面外に出たら終了
-        if current_draw_x >= view_end_x:
-            break
-            
-    # 最後の崖の後ろから画面端までを描画
-    if current_draw_x < view_end_x:
-        screen_x = int(current_draw_x - camera_x)
-        width = int(view_end_x - current_draw_x)
-        
-        ground_rect = pygame.Rect(screen_x, GROUND_Y, width, SCREEN_HEIGHT - GROUND_Y)
-        pygame.draw.rect(screen, (255, 255, 255), ground_rect)
-        pygame.draw.rect(screen, tuple(config['ground']['color']), ground_rect, 3)
+        # 地面（崖以外の部分）は world_chunks のチャンク単位で、描画済みのものを貼る
+        world.draw_ground(screen, camera_x)
+        dirty_rects.save_static(screen)
+    profiler.mark("ground")
 
     # プレイヤー（画面上で位置固定）
     # カメラが動いているか、またはキー入力がある場合に「動いている」とみなす
     is_moving = abs(camera_vx) > 0.1
-    player.draw(screen, is_moving)
+    dirty_rects.add(player.draw(screen, is_moving))
 
-    # 段差
-    for platform in platforms:
-        platform.draw(screen, camera_x)
+    # 段差（止まっている足場はチャンクに描いてあり画素が変わらないので、動いている足場だけ送る）
+    for rect in world.draw_platforms(screen, camera_x):
+        dirty_rects.add(rect)
 
     # 敵
-    for enemy in enemies:
-        enemy.draw(screen, camera_x)
+    # 画面に映る敵だけ描画する
+    if enemy_batch is not None:
+        for i in enemy_batch.visible(enemies, camera_x, SCREEN_WIDTH, SCREEN_HEIGHT):
+            dirty_rects.add(enemies[i].draw(screen, camera_x))
+    else:
+        for enemy in enemies:
+            if enemy.is_visible(camera_x, SCREEN_WIDTH, SCREEN_HEIGHT):
+                dirty_rects.add(enemy.draw(screen, camera_x))
 
     # ゴール
-    goal.draw(screen, camera_x)
+    dirty_rects.add(goal.draw(screen, camera_x))
+    profiler.mark("entities")
 
     # 情報表示
     if game_over:
         info_text = "GAME OVER! Press R to restart"
-        text_surf = font.render(info_text, True, (255, 0, 0))
+        text_surf = text_cache.render(font, info_text, True, (255, 0, 0))
         text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        screen.blit(text_surf, text_rect)
+        dirty_rects.add(screen.blit(text_surf, text_rect))
     elif game_clear:
         info_text = "GOAL! You cleared the game! Press R to restart"
-        text_surf = font.render(info_text, True, (0, 200, 0))
+        text_surf = text_cache.render(font, info_text, True, (0, 200, 0))
         text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        screen.blit(text_surf, text_rect)
+        dirty_rects.add(screen.blit(text_surf, text_rect))
     else:
         info_text = f"Use LEFT/RIGHT to scroll / SPACE to jump / Enemies: {len(enemies)}"
-        text_surf = font.render(info_text, True, (0, 0, 0))
-        screen.blit(text_surf, (10, 10))
+        text_surf = text_cache.render(font, info_text, True, (0, 0, 0))
+        dirty_rects.add(screen.blit(text_surf, (10, 10)))
 
     # カスタムテキスト表示(右上) - シンプルな表示
     if display_text and display_text_timer > 0:
         # 黒文字、背景なし、枠線なし
-        text_surf = large_font.render(display_text, True, (0, 0, 0)) # 強制的に黒
+        text_surf = text_cache.render(large_font, display_text, True, (0, 0, 0)) # 強制的に黒
 
         text_w, text_h = text_surf.get_size()
         text_x = SCREEN_WIDTH - text_w - 10
         text_y = 10
 
-        screen.blit(text_surf, (text_x, text_y))
+        dirty_rects.add(screen.blit(text_surf, (text_x, text_y)))
 
         display_text_timer -= 1
     
     # AIステータステキスト表示（右上、display_textの下）
     if ai_status_text:
-        status_surf = large_font.render(ai_status_text, True, (0, 0, 0))
+        status_surf = text_cache.render(large_font, ai_status_text, True, (0, 0, 0))
         status_w, status_h = status_surf.get_size()
         status_x = SCREEN_WIDTH - status_w - 10
         status_y = 35  # display_textの下に表示
-        screen.blit(status_surf, (status_x, status_y))
+        dirty_rects.add(screen.blit(status_surf, (status_x, status_y)))
 
     # オーバーレイ描画
-    for drawing in overlay_drawings:
-        if drawing["type"] == "circle":
-            pygame.draw.circle(screen, drawing["color"], (drawing["x"], drawing["y"]), drawing["radius"], drawing["width"])
-        elif drawing["type"] == "rect":
-            rect = pygame.Rect(drawing["x"], drawing["y"], drawing["width"], drawing["height"])
-            pygame.draw.rect(screen, drawing["color"], rect, drawing["line_width"])
-        elif drawing["type"] == "line":
-            pygame.draw.line(screen, drawing["color"], (drawing["start_x"], drawing["start_y"]), (drawing["end_x"], drawing["end_y"]), drawing["width"])
-
-    pygame.display.flip()
+    for rect in overlay.draw(screen):
+        dirty_rects.add(rect)
+    profiler.mark("overlay")
+
+    # プロファイラ HUD（F3）
+    dirty_rects.add(profiler.draw(screen, FPS))
+    profiler.mark("hud")
+
+    dirty_rects.present()
+    profiler.mark("flip")
+    profiler.end_frame()
+    if not input_source.replaying:
+        entity_budget.record(profiler.frame_times[-1])
+    input_source.end_frame()
 
 # 終了処理
 pygame.quit()
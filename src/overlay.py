@@ -0,0 +1,95 @@
+# overlay.py
+# スクリプトが draw_circle / draw_rect / draw_line / draw_enemy_overlay で描く図形を持つ
+#
+# 図形は 2 種類:
+#   - 残す図形（persistent、既定）: clear_overlay まで残る。透明な Surface に 1 回だけ描いておき、
+#     毎フレームはその Surface を 1 回 blit するだけにする。
+#   - そのフレームだけの図形（persistent=False）: 次のフレームのコマンドを受け取る前に消える。毎フレーム直接描く。
+# 残す図形は max_items 個までで、超えたら古いものから 1/4 をまとめて捨てる（毎 tick 描き足すスクリプトでも増え続けない）。
+# 捨てたときと clear() のときだけ Surface を描き直す。
+from collections import deque
+
+import pygame
+
+
+def _draw(surface, item):
+    """図形を 1 つ描いて、描いた範囲の Rect を返す"""
+    kind = item["type"]
+    # 画面に直接描いていたときと同じく、色のアルファ値は使わない
+    color = item["color"][:3]
+    if kind == "circle":
+        return pygame.draw.circle(surface, color, (item["x"], item["y"]), item["radius"], item["width"])
+    if kind == "rect":
+        rect = pygame.Rect(item["x"], item["y"], item["width"], item["height"])
+        return pygame.draw.rect(surface, color, rect, item["line_width"])
+    if kind == "line":
+        return pygame.draw.line(surface, color, (item["start_x"], item["start_y"]),
+                                (item["end_x"], item["end_y"]), item["width"])
+    return None
+
+
+class OverlayLayer:
+    def __init__(self, max_items=2000):
+        self.max_items = max_items
+        self._persistent = deque()
+        self._immediate = []
+        self._surface = None      # 残す図形を描いた透明な Surface
+        self._bounds = None       # その Surface で何か描かれている範囲
+        self._stale = False       # True なら次の draw で Surface を描き直す
+
+    def __len__(self):
+        return len(self._persistent) + len(self._immediate)
+
+    def add(self, item, persistent=True):
+        """図形（{"type": "circle" | "rect" | "line", ...}）を追加する"""
+        if not persistent:
+            self._immediate.append(item)
+            return
+        self._persistent.append(item)
+        if len(self._persistent) > self.max_items:
+            # 1 個ずつ捨てると毎回描き直しになるので、古い 1/4 をまとめて捨てる
+            keep = self.max_items * 3 // 4
+            while len(self._persistent) > keep:
+                self._persistent.popleft()
+            self._stale = True
+        elif self._surface is not None and not self._stale:
+            # 描き足すだけなら Surface はそのまま使える
+            self._extend_bounds(_draw(self._surface, item))
+
+    def begin_frame(self):
+        """そのフレームだけの図形を消す（フレームのコマンドを適用する前に呼ぶ）"""
+        self._immediate.clear()
+
+    def clear(self):
+        self._persistent.clear()
+        self._immediate.clear()
+        self._stale = True
+
+    def _extend_bounds(self, rect):
+        if rect is None or not (rect.width and rect.height):
+            return
+        self._bounds = rect if self._bounds is None else self._bounds.union(rect)
+
+    def _rebuild(self, size):
+        if self._surface is None or self._surface.get_size() != size:
+            self._surface = pygame.Surface(size, pygame.SRCALPHA)
+        self._surface.fill((0, 0, 0, 0))
+        self._bounds = None
+        for item in self._persistent:
+            self._extend_bounds(_draw(self._surface, item))
+        self._stale = False
+
+    def draw(self, screen):
+        """図形を画面に描き、描いた範囲の Rect のリストを返す"""
+        rects = []
+        if self._persistent or self._surface is not None:
+            if self._stale or self._surface is None or self._surface.get_size() != screen.get_size():
+                self._rebuild(screen.get_size())
+            if self._bounds is not None:
+                area = self._bounds.clip(self._surface.get_rect())
+                rects.append(screen.blit(self._surface, area.topleft, area))
+        for item in self._immediate:
+            rect = _draw(screen, item)
+            if rect is not None:
+                rects.append(rect)
+        return rects
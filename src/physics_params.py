@@ -0,0 +1,61 @@
+# physics_params.py
+# config['physics'] の値を型付きの属性として持つ
+#
+# 毎フレームの config['physics']['gravity'] のような dict 参照の代わりに physics.gravity を読む。
+# set_config などで値を変えるときは set() を通し、範囲に丸めてから
+# 属性と config['physics'] の両方に書く（get_config や make_state と食い違わないように）。
+# 値が変わると subscribe() で登録した関数に (名前, 新しい値) を通知する。
+
+
+# 名前: (既定値, 最小, 最大)
+FIELDS = {
+    "gravity": (0.8, -5.0, 5.0),
+    "jump_strength": (-15.0, -60.0, 60.0),
+    "acceleration": (0.333, 0.0, 30.0),
+    "deceleration": (0.2, 0.0, 30.0),
+    "max_speed": (5.33, 0.5, 30.0),
+    "bg_scroll_speed": (5.0, 0.0, 100.0),
+}
+
+
+class PhysicsParams:
+    __slots__ = tuple(FIELDS) + ("_config", "_listeners")
+
+    def __init__(self, config):
+        self._config = config
+        self._listeners = []
+        self.load()
+
+    def subscribe(self, callback):
+        """値が変わったときに callback(name, value) を呼ぶ"""
+        self._listeners.append(callback)
+
+    def load(self):
+        """config['physics'] から全項目を読み直す（config の再読み込み後など）"""
+        section = self._config.get('physics')
+        if not isinstance(section, dict):
+            section = self._config['physics'] = {}
+        for name, (default, _, _) in FIELDS.items():
+            self.set(name, section.get(name, default))
+
+    def set(self, name, value):
+        """name を value に設定する。physics の項目でなければ False を返す"""
+        if name not in FIELDS:
+            return False
+        _, lo, hi = FIELDS[name]
+        old = getattr(self, name, None)
+        try:
+            new = max(lo, min(hi, float(value)))
+        except (TypeError, ValueError):
+            print(f"Ignoring invalid physics.{name}: {value!r}")
+            new = old if old is not None else FIELDS[name][0]
+
+        setattr(self, name, new)
+        section = self._config.get('physics')
+        if not isinstance(section, dict):
+            section = self._config['physics'] = {}
+        section[name] = new
+        if new != old:
+            for callback in self._listeners:
+                callback(name, new)
+        return True
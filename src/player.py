@@ -1,8 +1,21 @@
 import pygame
 
+from physics_params import PhysicsParams
+from sprite_atlas import get_atlas
+
 
 class Player:
-    def __init__(self, x_screen, ground_y, config):
+    # インスタンスごとの __dict__ を持たない（属性アクセスが速く、メモリも少ない）
+    __slots__ = (
+        "x_screen", "width", "height", "base_width", "base_height", "color",
+        "shoe_width", "shoe_height", "base_shoe_width", "base_shoe_height", "shoe_color",
+        "scale", "images", "jump_image", "source_images", "source_jump_image", "use_image",
+        "animation_timer", "current_frame_index", "ANIMATION_SPEED",
+        "ground_y", "config", "physics", "max_jump_time",
+        "y", "vy", "is_jumping", "jump_time", "jump_held", "facing_right", "jump_count", "max_jumps",
+    )
+
+    def __init__(self, x_screen, ground_y, config, physics=None):
         # Basic settings
         self.x_screen = x_screen  # Fixed x position on the screen (world coordinate is camera_x + x_screen)
         self.width = config['player']['width']
@@ -27,20 +40,7 @@ class Player:
         self.source_images = []
         self.source_jump_image = None
         self.use_image = False
-        try:
-            # Load walking animation (1.png to 8.png)
-            for i in range(1, 9):
-                img = pygame.image.load(f'assets/player/{i}.png').convert_alpha()
-                self.source_images.append(img)
-            
-            # Load jump image
-            self.source_jump_image = pygame.image.load('assets/player/jump.png').convert_alpha()
-            self._refresh_images()
-            
-            self.use_image = True
-        except Exception as e:
-            print(f"Failed to load player images: {e}")
-            self.use_image = False
+        self.load_images()
 
         # Animation state
         self.animation_timer = 0
@@ -51,7 +51,8 @@ class Player:
         # Physics parameters
         self.ground_y = ground_y
         self.config = config
-        # Removed self.gravity to reference config['physics']['gravity'] directly
+        # Physics values are read from PhysicsParams (shared with main.py) so runtime changes take effect
+        self.physics = physics if physics is not None else PhysicsParams(config)
         # self.jump_strength = -10      # Removed: use config directly
         self.max_jump_time = 15       # MAX_JUMP_TIME と同じ
 
@@ -71,6 +72,18 @@ class Player:
         initial_scale = config['player'].get('scale', 1.0)
         self.set_scale(initial_scale)
 
+    def load_images(self):
+        """歩きの 8 コマとジャンプの 1 コマをスプライトアトラスの subsurface から取る
+
+        アトラスをバックグラウンドで読み込んでいる間に作ったときは、読み終わってからもう一度呼ぶ。
+        """
+        frames = get_atlas().group("player")
+        if frames:
+            self.source_images = frames[:8]
+            self.source_jump_image = frames[8]
+            self._refresh_images()
+            self.use_image = True
+
     def _refresh_images(self):
         if not self.source_images:
             return
@@ -105,7 +118,7 @@ class Player:
     def start_jump(self):
         if self.jump_count < self.max_jumps:
             # Use jump_strength from config
-            self.vy = self.config['physics']['jump_strength']
+            self.vy = self.physics.jump_strength
             self.is_jumping = True
             self.jump_held = True
             self.jump_time = 0
@@ -125,9 +138,9 @@ class Player:
     # Physics update ---------------------------------
     def update(self):
         """Per-frame physics update.
-        Gravity is read directly from `config` so runtime changes take effect.
+        Gravity is read from `physics` every frame so runtime changes take effect.
         """
-        gravity = self.config['physics']['gravity']
+        gravity = self.physics.gravity
 
         # Variable jump (reduce gravity while the jump is held)
         if self.jump_held and self.is_jumping and self.jump_time < self.max_jump_time and self.vy < 0:
@@ -151,7 +164,7 @@ class Player:
 
     # Bounce when stomping an enemy ------------------
     def stomp_enemy(self, jump_key_pressed: bool):
-        jump_strength = self.config['physics']['jump_strength']
+        jump_strength = self.physics.jump_strength
         if jump_key_pressed:
             # Jump key pressed -> big bounce
             self.vy = jump_strength * 1.3
@@ -183,6 +196,7 @@ class Player:
         )
 
     def draw(self, surface, is_moving=False):
+        """描いた範囲の Rect を返す"""
         if self.use_image and self.images:
             # Select image
             if self.is_jumping and self.jump_image:
@@ -206,14 +220,14 @@ class Player:
             
             # Flip based on facing direction
             if self.facing_right:
-                surface.blit(current_img, (image_x, image_y))
+                return surface.blit(current_img, (image_x, image_y))
             else:
                 flipped_image = pygame.transform.flip(current_img, True, False)
-                surface.blit(flipped_image, (image_x, image_y))                
+                return surface.blit(flipped_image, (image_x, image_y))
         else:
             # Fallback: draw rectangles
-            pygame.draw.rect(surface, self.color, self.get_rect())
-            pygame.draw.rect(surface, self.shoe_color, self.get_shoe_rect())
+            body = pygame.draw.rect(surface, self.color, self.get_rect())
+            return body.union(pygame.draw.rect(surface, self.shoe_color, self.get_shoe_rect()))
 
     # リセット -----------------------------------
     def reset(self):
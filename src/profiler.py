@@ -0,0 +1,185 @@
+# profiler.py
+# メインループの各フェーズの処理時間を計測する軽量プロファイラ
+#
+# 使い方（main.py）:
+#   profiler.start_frame()
+#   ... イベント処理 ...
+#   profiler.mark("events")     # 直前の mark からの経過時間を "events" に加算
+#   ...
+#   profiler.end_frame()
+#
+# 計測は常に行い（perf_counter を数回呼ぶだけ）、F3 で HUD を表示する。
+# tracer を渡すと各セクションとフレーム全体を trace-event のスパンとしても記録する。
+import time
+from collections import deque
+
+import pygame
+
+
+# HUD に表示する順番
+SECTIONS = (
+    "events",
+    "flags",
+    "input",
+    "platforms",
+    "player",
+    "enemies",
+    "collision",
+    "send_state",
+    "commands",
+    "background",
+    "ground",
+    "entities",
+    "overlay",
+    "hud",
+    "flip",
+)
+
+
+def percentile(sorted_values, p):
+    """ソート済みリストから p (0〜100) パーセンタイルを返す"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class FrameProfiler:
+    def __init__(self, history=300, sections=SECTIONS, tracer=None):
+        self.history = history
+        self.tracer = tracer if tracer is not None and tracer.enabled else None
+        self.sections = list(sections)
+        # セクションごとのリングバッファ（ms）
+        self.samples = {name: deque(maxlen=history) for name in self.sections}
+        self.frame_times = deque(maxlen=history)   # フレーム内の処理時間（tick の待ちを除く）
+        self.frame_periods = deque(maxlen=history)  # 前フレーム開始からの経過時間
+        self.frame_count = 0
+        self.visible = False
+
+        self._current = dict.fromkeys(self.sections, 0.0)
+        self._frame_start = None
+        self._last = None
+
+        # HUD はテキスト描画が重いので一定間隔でだけ作り直す
+        self.hud_refresh_frames = 15
+        self._hud_surface = None
+        self._hud_age = 0
+        self._font = None
+
+    # ---- 計測 ----
+    def start_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_periods.append((now - self._frame_start) * 1000.0)
+        self._frame_start = now
+        self._last = now
+        current = self._current
+        for name in current:
+            current[name] = 0.0
+
+    def mark(self, name):
+        """直前の mark（またはフレーム開始）からの経過時間を name に加算する"""
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000.0
+        if self.tracer is not None:
+            self.tracer.complete(name, self._last, now)
+        self._last = now
+        if name in self._current:
+            self._current[name] += elapsed
+        else:
+            self._current[name] = elapsed
+            self.sections.append(name)
+            self.samples[name] = deque(maxlen=self.history)
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        now = time.perf_counter()
+        self.frame_times.append((now - self._frame_start) * 1000.0)
+        if self.tracer is not None:
+            self.tracer.complete("frame", self._frame_start, now, args={"frame": self.frame_count})
+        for name, value in self._current.items():
+            self.samples[name].append(value)
+        self.frame_count += 1
+
+    # ---- 集計 ----
+    def stats(self, name=None):
+        """(p50, p95, p99, max) を返す。name=None ならフレーム全体"""
+        values = self.frame_times if name is None else self.samples.get(name, ())
+        ordered = sorted(values)
+        if not ordered:
+            return 0.0, 0.0, 0.0, 0.0
+        return (percentile(ordered, 50), percentile(ordered, 95),
+                percentile(ordered, 99), ordered[-1])
+
+    def summary(self):
+        """JSON に書き出せる形で集計結果を返す"""
+        def entry(name):
+            p50, p95, p99, worst = self.stats(name)
+            values = self.frame_times if name is None else self.samples[name]
+            mean = sum(values) / len(values) if values else 0.0
+            return {"mean": mean, "p50": p50, "p95": p95, "p99": p99, "max": worst}
+
+        return {
+            "frames": self.frame_count,
+            "frame": entry(None),
+            "sections": {name: entry(name) for name in self.sections},
+        }
+
+    # ---- HUD ----
+    def toggle(self):
+        self.visible = not self.visible
+        self._hud_surface = None
+
+    def draw(self, surface, fps):
+        """HUD を描き、描いた範囲の Rect を返す（非表示なら None）"""
+        if not self.visible:
+            return None
+        self._hud_age += 1
+        if self._hud_surface is None or self._hud_age >= self.hud_refresh_frames:
+            self._hud_surface = self._build_hud(fps)
+            self._hud_age = 0
+        return surface.blit(self._hud_surface, (10, 40))
+
+    def _build_hud(self, fps):
+        if self._font is None:
+            # デフォルトフォントならシステムフォントの探索が発生しない
+            self._font = pygame.font.Font(None, 18)
+        font = self._font
+        line_h = font.get_linesize()
+        graph_h = 60
+        width = 300
+        rows = ["frame"] + [name for name in self.sections if self.samples[name]]
+        height = 8 + line_h * (len(rows) + 1) + graph_h + 8
+
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+
+        y = 4
+        header = font.render("section        p50    p95    p99  (ms)", True, (200, 200, 200))
+        panel.blit(header, (6, y))
+        y += line_h
+        for name in rows:
+            p50, p95, p99, _ = self.stats(None if name == "frame" else name)
+            color = (255, 255, 0) if name == "frame" else (255, 255, 255)
+            line = f"{name:<12} {p50:6.2f} {p95:6.2f} {p99:6.2f}"
+            panel.blit(font.render(line, True, color), (6, y))
+            y += line_h
+
+        # フレーム時間のグラフ（緑の線がフレーム予算 1000/FPS）
+        y += 4
+        budget = 1000.0 / fps if fps else 16.7
+        scale_max = budget * 2
+        graph_rect = pygame.Rect(6, y, width - 12, graph_h)
+        pygame.draw.rect(panel, (40, 40, 40, 200), graph_rect)
+        values = list(self.frame_times)[-graph_rect.width:]
+        for i, value in enumerate(values):
+            bar_h = min(graph_h, int(value / scale_max * graph_h))
+            color = (255, 80, 80) if value > budget else (120, 200, 255)
+            x = graph_rect.left + i
+            pygame.draw.line(panel, color, (x, graph_rect.bottom - 1), (x, graph_rect.bottom - bar_h))
+        budget_y = graph_rect.bottom - int(budget / scale_max * graph_h)
+        pygame.draw.line(panel, (0, 255, 0), (graph_rect.left, budget_y), (graph_rect.right - 1, budget_y))
+        return panel
@@ -0,0 +1,281 @@
+# replay.py
+# 入力・runner からのコマンド・乱数シードを記録し、同じ流れを再生する
+#
+# 記録ファイルは gzip 圧縮した JSON Lines:
+#   1 行目: ヘッダ {"version", "seed", "fps", "config_sha256"}
+#   2 行目以降: 1 フレーム 1 行。空の項目は省略する
+#     "t": make_state に渡した time_ms
+#     "k": 押下中キーのビットマスク（TRACKED_KEYS の順）
+#     "e": キーイベント [[種類, キーのビット番号], ...]（種類 0=KEYDOWN, 1=KEYUP, 2=QUIT）
+#     "c": そのフレームで適用したコマンドのリスト
+#     "h": make_state の CRC32（再生時に挙動が変わっていないかの確認用）
+#     "b": entity_budget の負荷レベル（0 のときは省略。再生時は計測せずこの値を使う）
+#
+# 再生時は custom_runner を起動せず、記録したコマンドをそのまま流し込む。
+import gzip
+import hashlib
+import json
+import zlib
+
+import pygame
+
+
+FORMAT_VERSION = 1
+
+# ゲームが参照するキーだけを記録する（F3 などのデバッグ用キーは含めない）
+TRACKED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_r)
+_KEY_BITS = {key: i for i, key in enumerate(TRACKED_KEYS)}
+
+_EVENT_KEYDOWN = 0
+_EVENT_KEYUP = 1
+_EVENT_QUIT = 2
+
+
+def state_hash(state):
+    """state dict の内容から決定的なハッシュを作る"""
+    data = json.dumps(state, sort_keys=True, separators=(",", ":"))
+    return zlib.crc32(data.encode("utf-8"))
+
+
+def config_sha256(path="config/config.json"):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def make_frame(pressed=(), keydown=(), keyup=(), commands=None, time_ms=None):
+    """記録ファイル 1 フレーム分の dict を作る（ベンチマーク用の合成記録向け）"""
+    frame = {}
+    if time_ms is not None:
+        frame["t"] = time_ms
+    mask = 0
+    for key in pressed:
+        mask |= 1 << _KEY_BITS[key]
+    if mask:
+        frame["k"] = mask
+    events = [[_EVENT_KEYDOWN, _KEY_BITS[key]] for key in keydown]
+    events += [[_EVENT_KEYUP, _KEY_BITS[key]] for key in keyup]
+    if events:
+        frame["e"] = events
+    if commands:
+        frame["c"] = list(commands)
+    return frame
+
+
+def write_recording(path, frames, seed=0, fps=60):
+    """make_frame で作ったフレームのリストを記録ファイルとして書き出す"""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        header = {"version": FORMAT_VERSION, "seed": seed, "fps": fps, "config_sha256": None}
+        f.write(json.dumps(header) + "\n")
+        for frame in frames:
+            f.write(json.dumps(frame, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+
+class _ReplayKeys:
+    """pygame.key.get_pressed() の代わりに使う（keys[pygame.K_xxx] で参照できる）"""
+
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        bit = _KEY_BITS.get(key)
+        return bit is not None and bool(self.mask & (1 << bit))
+
+
+class LiveInput:
+    """通常プレイ時の入力（pygame からそのまま読む）"""
+    recording = False
+    replaying = False
+
+    def __init__(self):
+        self.frame = -1
+        self._pressed = None
+
+    def begin_frame(self):
+        """フレームのイベントを取得する。押下状態もここで確定させる"""
+        self.frame += 1
+        events = pygame.event.get()
+        self._pressed = pygame.key.get_pressed()
+        return events
+
+    def pressed(self):
+        return self._pressed
+
+    def ticks(self):
+        return pygame.time.get_ticks()
+
+    def commands(self, conn):
+        return conn.poll_commands()
+
+    def budget_level(self, level):
+        return level
+
+    def check_state(self, state):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class InputRecorder(LiveInput):
+    """通常プレイしながら入力とコマンドをファイルに記録する"""
+    recording = True
+
+    def __init__(self, path, seed, fps):
+        super().__init__()
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        header = {
+            "version": FORMAT_VERSION,
+            "seed": seed,
+            "fps": fps,
+            "config_sha256": config_sha256(),
+        }
+        self._file.write(json.dumps(header) + "\n")
+        self._record = {}
+
+    def begin_frame(self):
+        events = super().begin_frame()
+        self._record = {}
+
+        recorded = []
+        for event in events:
+            if event.type == pygame.QUIT:
+                recorded.append([_EVENT_QUIT, 0])
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in _KEY_BITS:
+                kind = _EVENT_KEYDOWN if event.type == pygame.KEYDOWN else _EVENT_KEYUP
+                recorded.append([kind, _KEY_BITS[event.key]])
+        if recorded:
+            self._record["e"] = recorded
+
+        mask = 0
+        for key, bit in _KEY_BITS.items():
+            if self._pressed[key]:
+                mask |= 1 << bit
+        if mask:
+            self._record["k"] = mask
+        return events
+
+    def ticks(self):
+        now = super().ticks()
+        self._record["t"] = now
+        return now
+
+    def commands(self, conn):
+        received = self._record.setdefault("c", [])
+        for cmd in conn.poll_commands():
+            received.append(cmd)
+            yield cmd
+
+    def budget_level(self, level):
+        if level:
+            self._record["b"] = level
+        return level
+
+    def check_state(self, state):
+        self._record["h"] = state_hash(state)
+
+    def end_frame(self):
+        if self._record.get("c") == []:
+            del self._record["c"]
+        self._file.write(json.dumps(self._record, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._record = {}
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            print(f"recording saved to {self.path} ({self.frame + 1} frames)")
+
+
+class InputReplay(LiveInput):
+    """記録ファイルからフレームごとに入力とコマンドを再生する"""
+    replaying = True
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            self.header = json.loads(f.readline())
+            self.frames = [json.loads(line) for line in f if line.strip()]
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported replay version: {self.header.get('version')}")
+        if self.header.get("config_sha256") not in (None, config_sha256()):
+            print("warning: config/config.json differs from the recording; replay may diverge")
+
+        self.seed = self.header.get("seed")
+        self.finished = False
+        self.mismatches = 0
+        self.first_mismatch = None
+        self._record = {}
+        self._last_ticks = 0
+
+    def begin_frame(self):
+        self.frame += 1
+        # ウィンドウを閉じる操作だけは実際のイベントから拾う
+        events = [event for event in pygame.event.get() if event.type == pygame.QUIT]
+        if self.frame >= len(self.frames):
+            self.finished = True
+            self._record = {}
+            self._pressed = _ReplayKeys(0)
+            events.append(pygame.event.Event(pygame.QUIT))
+            return events
+
+        self._record = self.frames[self.frame]
+        self._pressed = _ReplayKeys(self._record.get("k", 0))
+        for kind, bit in self._record.get("e", ()):
+            if kind == _EVENT_QUIT:
+                events.append(pygame.event.Event(pygame.QUIT))
+            else:
+                event_type = pygame.KEYDOWN if kind == _EVENT_KEYDOWN else pygame.KEYUP
+                events.append(pygame.event.Event(event_type, key=TRACKED_KEYS[bit]))
+        return events
+
+    def ticks(self):
+        self._last_ticks = self._record.get("t", self._last_ticks)
+        return self._last_ticks
+
+    def commands(self, conn):
+        return iter(self._record.get("c", ()))
+
+    def budget_level(self, level):
+        return self._record.get("b", 0)
+
+    def check_state(self, state):
+        expected = self._record.get("h")
+        if expected is not None and expected != state_hash(state):
+            self.mismatches += 1
+            if self.first_mismatch is None:
+                self.first_mismatch = self.frame
+
+    def close(self):
+        played = min(self.frame + 1, len(self.frames))
+        if self.mismatches:
+            print(f"replay: {played} frames, {self.mismatches} state mismatches (first at frame {self.first_mismatch})")
+        else:
+            print(f"replay: {played} frames, state matches the recording")
+
+
+class ReplayConnection:
+    """再生時に CustomConnection の代わりに使う（custom_runner を起動しない）"""
+
+    def __init__(self, replay):
+        self.replay = replay
+
+    def start(self):
+        pass
+
+    def restart(self):
+        pass
+
+    def send_state(self, state, frame=None):
+        # 実際の送信と同じだけのエンコードは行い、計測結果を実プレイに近づける
+        json.dumps({"type": "tick", "frame": frame, "state": state})
+
+    def poll_commands(self):
+        return iter(())
@@ -0,0 +1,178 @@
+# sprite_atlas.py
+# プレイヤー・敵・ゴールのアニメーション画像を 1 枚のテクスチャ（アトラス）にまとめる
+#
+# 17 枚の PNG を別々に読む代わりに、1 枚の Surface に詰めて並べ、各コマは subsurface として渡す。
+# 詰めたアトラスは .asset_cache/ に生の画素（asset_cache.py）とコマの位置の JSON として保存しておき、
+# 次回からはそれを読み込む（ファイル名が元の PNG の中身のハッシュなので、PNG が変われば作り直す）。
+#
+# 画像はグループ（"player" など）ごとに名前の順で並ぶ。グループの画像が 1 枚でも読めなければ、
+# そのグループは空になる（今までの「読めなければ矩形で描く」フォールバックと同じ）。
+# main.py はアトラスをワーカースレッドで読む（defer() / load_atlas()。asset_loader.py）。
+import hashlib
+import json
+import threading
+
+import pygame
+
+import asset_cache
+
+
+# グループ名 -> [(コマの名前, 元の画像のパス)]
+SOURCES = {
+    "player": [(str(i), f"assets/player/{i}.png") for i in range(1, 9)] + [("jump", "assets/player/jump.png")],
+    "enemy": [(str(i), f"assets/enemy/{i}.png") for i in range(1, 5)],
+    "goal": [(str(i), f"assets/goal/{i}.png") for i in range(1, 5)],
+}
+
+# アトラスの 1 辺の上限（GPU テクスチャでよくある上限に合わせる）
+MAX_SIDE = 8192
+
+
+def cache_key(sources=SOURCES):
+    """元の PNG 全部の中身から決まるキャッシュのキー"""
+    h = hashlib.sha1()
+    for group, entries in sources.items():
+        for name, path in entries:
+            h.update(f"{group}/{name}:{asset_cache.source_digest(path)};".encode())
+    return "atlas-" + h.hexdigest()
+
+
+def _pack(sizes):
+    """(幅, 高さ) のリストを棚詰めする。((アトラスの幅, 高さ), [各コマの (x, y)]) を返す
+
+    高い順に左から並べ、幅を超えたら次の段へ。いくつかの幅で試して、1 辺が MAX_SIDE 以内で面積が最小のものを使う。
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    widest = max(w for w, _ in sizes)
+    total = sum(w for w, _ in sizes)
+    best = None
+    for limit in sorted({widest, total} | {widest * k for k in range(2, 9) if widest * k < total}):
+        positions = [None] * len(sizes)
+        x = y = row_h = used_w = 0
+        for i in order:
+            w, h = sizes[i]
+            if x and x + w > limit:
+                y += row_h
+                x = row_h = 0
+            positions[i] = (x, y)
+            x += w
+            row_h = max(row_h, h)
+            used_w = max(used_w, x)
+        size = (used_w, y + row_h)
+        score = (max(size) > MAX_SIDE, size[0] * size[1])
+        if best is None or score < best[0]:
+            best = (score, size, positions)
+    return best[1], best[2]
+
+
+class SpriteAtlas:
+    def __init__(self, surface, frames):
+        self.surface = surface
+        self.frames = frames      # "グループ/名前" -> pygame.Rect
+        self._subsurfaces = {}
+
+    def frame(self, name):
+        """コマ（アトラスの subsurface）を返す。なければ None"""
+        rect = self.frames.get(name)
+        if rect is None:
+            return None
+        sub = self._subsurfaces.get(name)
+        if sub is None:
+            sub = self._subsurfaces[name] = self.surface.subsurface(rect)
+        return sub
+
+    def group(self, group):
+        """グループのコマを SOURCES の順で返す。1 枚でも欠けていれば空のリスト"""
+        names = [f"{group}/{name}" for name, _ in SOURCES[group]]
+        if not all(name in self.frames for name in names):
+            return []
+        return [self.frame(name) for name in names]
+
+    @classmethod
+    def build(cls, sources=SOURCES):
+        """元の PNG を読み込んで 1 枚に詰める"""
+        images = {}
+        for group, entries in sources.items():
+            try:
+                for name, path in entries:
+                    images[f"{group}/{name}"] = pygame.image.load(path).convert_alpha()
+            except Exception as e:
+                print(f"Failed to load {group} images: {e}")
+        if not images:
+            return cls(pygame.Surface((1, 1), pygame.SRCALPHA), {})
+
+        names = list(images)
+        (width, height), positions = _pack([images[n].get_size() for n in names])
+        surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        frames = {}
+        for name, (x, y) in zip(names, positions):
+            # 透明 (0, 0, 0, 0) の上に BLEND_RGBA_MAX で貼ると、アルファ合成されずに画素がそのまま写る
+            surface.blit(images[name], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+            frames[name] = pygame.Rect((x, y), images[name].get_size())
+        return cls(surface, frames)
+
+    def save(self, key):
+        asset_cache.save_surface(asset_cache.cache_path(key, "rgba"), self.surface)
+        frames = {n: list(r) for n, r in self.frames.items()}
+        asset_cache.write_atomic(asset_cache.cache_path(key, "json"), [json.dumps(frames).encode()])
+
+    @classmethod
+    def load(cls, key):
+        """保存したアトラスを読む。なければ None"""
+        try:
+            with open(asset_cache.cache_path(key, "json"), "r", encoding="utf-8") as f:
+                frames = json.load(f)
+        except (OSError, ValueError):
+            return None
+        surface = asset_cache.load_surface(asset_cache.cache_path(key, "rgba"))
+        if surface is None:
+            return None
+        return cls(surface, {n: pygame.Rect(r) for n, r in frames.items()})
+
+
+_atlas = None
+_lock = threading.Lock()
+_deferred = False     # True の間（ワーカースレッドで読み込み中）は get_atlas() が空のアトラスを返す
+_EMPTY = SpriteAtlas(None, {})
+
+
+def defer():
+    """アトラスを load_atlas() でワーカースレッドから読み込むときに、先に呼んでおく
+
+    読み終わるまでに作ったプレイヤー・敵・ゴールは画像なしになるので、読み終わったら画像を付け直すこと。
+    """
+    global _deferred
+    _deferred = True
+
+
+def load_atlas():
+    """共有のアトラスを読み込む。保存済みのものを読むか、なければ作って保存する"""
+    global _atlas, _deferred
+    with _lock:
+        if _atlas is None:
+            try:
+                key = cache_key()
+            except OSError:
+                key = None   # 元の PNG が足りない（build で読めたグループだけ使う）
+            atlas = SpriteAtlas.load(key) if key else None
+            if atlas is None:
+                atlas = SpriteAtlas.build()
+                if key and atlas.frames:
+                    try:
+                        atlas.save(key)
+                    except (OSError, pygame.error) as e:
+                        print(f"Could not write sprite atlas cache: {e}")
+            _atlas = atlas
+        _deferred = False
+        return _atlas
+
+
+def get_atlas():
+    """共有のアトラス（まだ読んでいなければここで読む。defer() 後の読み込み中は空のアトラス）"""
+    atlas = _atlas
+    if atlas is None:
+        if _deferred:
+            return _EMPTY
+        atlas = load_atlas()
+    return atlas
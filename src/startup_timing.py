@@ -0,0 +1,86 @@
+# startup_timing.py
+# 起動にかかった時間の内訳を記録する（--startup-log PATH / 環境変数 VIBE_STARTUP_LOG）
+#
+#   段階: mark() で区切った時間（import・pygame の初期化・フォント・エンティティの生成・runner の起動など）
+#   import: main.py から import したモジュールごとの時間。python -X importtime と同じく、
+#           そのモジュール自身の時間（self）と、中で import したものを含む時間（cumulative）を出す。
+# 展示でクラッシュから再起動するまでの時間を詰めるときに、どこが遅いかを見るためのもの。
+import builtins
+import sys
+import time
+
+
+STARTUP_LOG_ENV = "VIBE_STARTUP_LOG"
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = []        # (名前, 秒)
+        self.events = []        # (名前, 起動からの秒)
+        self.imports = []       # (深さ, モジュール名, 自身の秒, 累積の秒)。終わった順（-X importtime と同じ）
+        self.finished = False
+        self._original_import = None
+        self._children = []     # import 中のモジュールごとの、中で import したものの時間の合計
+
+    # ---- import ----
+    def track_imports(self):
+        """ここから stop_imports() までの import の時間を測る（メインスレッドだけで import している間に使う）"""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def stop_imports(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            # 読み込み済み（と相対 import）は測らない。かかった時間は呼び出し元に入る
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - t0
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += total
+            self.imports.append((len(self._children), name, total - children, total))
+
+    # ---- 段階 ----
+    def mark(self, name):
+        """前の mark() からここまでを name の段階として記録する"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def event(self, name):
+        """起動からの時刻を記録する（ワーカースレッドの読み込みが終わった時刻など）"""
+        self.events.append((name, time.perf_counter() - self.start))
+
+    def finish(self, path=None, min_import_ms=1.0):
+        """記録を終えて、path があればログを書く"""
+        self.finished = True
+        self.stop_imports()
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.report(min_import_ms))
+            print(f"startup timing written to {path}")
+
+    def report(self, min_import_ms=1.0):
+        lines = [f"startup: {(self._last - self.start) * 1000:.1f} ms until the main loop", "", "phases:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms")
+        if self.events:
+            lines += ["", "events (since start):"]
+            for name, seconds in self.events:
+                lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms")
+        lines += ["", f"imports (self / cumulative ms, cumulative >= {min_import_ms} ms, like python -X importtime):"]
+        for depth, name, self_time, total in self.imports:
+            if total * 1000 >= min_import_ms:
+                lines.append(f"  {self_time * 1000:8.1f} | {total * 1000:8.1f} | {'  ' * depth}{name}")
+        return "\n".join(lines) + "\n"
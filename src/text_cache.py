@@ -0,0 +1,39 @@
+# text_cache.py
+# font.render の結果をフレームをまたいで使い回す
+#
+# HUD の文字列（敵の数、display_text、AI のステータスなど）はほとんどのフレームで変わらないが、
+# font.render は毎回ラスタライズし直すので、特に日本語の長い文字列では重い。
+# (フォント, 文字列, アンチエイリアス, 色) をキーに描画済みの Surface を持ち、
+# max_size を超えたら最も長く使われていないものから捨てる（LRU）。
+# 返した Surface は共有されるので、呼び出し側で書き換えないこと。
+from collections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        """font.render(text, antialias, color) と同じ Surface を返す（キャッシュにあれば使い回す）"""
+        key = (font, text, antialias, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def __len__(self):
+        return len(self._surfaces)
@@ -0,0 +1,59 @@
+# tile_cache.py
+# 足場の「白い塗り＋枠線」の箱を、描画済みの Surface の blit で描く
+# （地面と止まっている足場は world_chunks.py がチャンクに描いておくので、ここを通るのは毎フレーム描く動く足場）
+#
+# pygame.draw.rect(fill) と pygame.draw.rect(outline, border) の 2 回の描画と同じ画素になる。
+# 箱の高さ・色・枠の太さごとに、上下の枠つきの横長の帯と、左右の枠の縦棒を 1 回だけ作っておき、
+# 帯を必要な幅だけ切り出して貼り、両端に縦棒を貼る（幅が毎フレーム変わっても作り直さない）。
+# 画面に収まらない箱（端にかかった足場など）は今まで通り pygame.draw.rect で描く。
+import pygame
+
+
+class BoxCache:
+    def __init__(self):
+        self._bands = {}   # (高さ, 塗り色, 枠の色, 枠の太さ) -> 上下の枠つきの帯
+        self._edges = {}   # (高さ, 枠の色, 枠の太さ) -> 左右の枠の縦棒
+
+    def _band(self, width, height, fill, outline, border):
+        key = (height, fill, outline, border)
+        band = self._bands.get(key)
+        if band is None or band.get_width() < width:
+            # 幅が足りなければ、余裕を持たせて作り直す
+            band = pygame.Surface((max(width, 1024, band.get_width() * 2 if band else 0), height)).convert()
+            band.fill(fill)
+            band.fill(outline, (0, 0, band.get_width(), border))
+            band.fill(outline, (0, height - border, band.get_width(), border))
+            self._bands[key] = band
+        return band
+
+    def _edge(self, height, outline, border):
+        key = (height, outline, border)
+        edge = self._edges.get(key)
+        if edge is None:
+            edge = pygame.Surface((border, height)).convert()
+            edge.fill(outline)
+            self._edges[key] = edge
+        return edge
+
+    def draw_box(self, surface, rect, fill, outline, border=3):
+        """rect を fill で塗り、内側に太さ border の outline の枠を描く"""
+        x, y, width, height = rect
+        fill = tuple(fill)
+        outline = tuple(outline)
+        if (width < border * 2 or height < border * 2
+                or not surface.get_rect().contains((x, y, width, height))):
+            # 枠だけで埋まる小さな箱と、画面からはみ出す箱は直接描く
+            # （はみ出した箱の枠の切り取り方は pygame.draw.rect に合わせる）
+            pygame.draw.rect(surface, fill, rect)
+            pygame.draw.rect(surface, outline, rect, border)
+            return pygame.Rect(x, y, width, height)
+        band = self._band(width, height, fill, outline, border)
+        edge = self._edge(height, outline, border)
+        surface.blit(band, (x, y), (0, 0, width, height))
+        surface.blit(edge, (x, y))
+        surface.blit(edge, (x + width - border, y))
+        return pygame.Rect(x, y, width, height)
+
+
+# Platform.draw（動いている足場）が使う
+box_cache = BoxCache()
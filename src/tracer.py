@@ -0,0 +1,122 @@
+# tracer.py
+# Chrome trace-event 形式（chrome://tracing / Perfetto で読める JSON）でスパンを記録する
+#
+# - デフォルトは無効。環境変数 VIBE_TRACE=出力パス（または main.py の --trace）で有効化
+# - バッファは VIBE_TRACE_MAX_EVENTS 件まで（超えたら古いものから捨てる）
+# - 時刻は time.perf_counter() を使う。Linux / Windows ではプロセス間で共通の
+#   単調時計なので、ゲーム本体と custom_runner のスパンを同じ時間軸に並べられる
+# - custom_runner は自分でファイルを書かず、commands メッセージに載せて
+#   ゲーム本体へ送る（ゲーム本体が 1 つのファイルにまとめて書き出す）
+import json
+import os
+import time
+from collections import deque
+
+
+TRACE_ENV = "VIBE_TRACE"
+TRACE_MAX_ENV = "VIBE_TRACE_MAX_EVENTS"
+DEFAULT_MAX_EVENTS = 200000
+
+
+class Tracer:
+    def __init__(self, path=None, process_name="game", max_events=DEFAULT_MAX_EVENTS):
+        self.path = path
+        self.enabled = bool(path)
+        self.pid = os.getpid()
+        self.process_name = process_name
+        self.events = deque(maxlen=max_events)
+        self.process_names = {self.pid: process_name}
+
+    @classmethod
+    def from_env(cls, process_name):
+        path = os.environ.get(TRACE_ENV) or None
+        try:
+            max_events = int(os.environ.get(TRACE_MAX_ENV, DEFAULT_MAX_EVENTS))
+        except ValueError:
+            max_events = DEFAULT_MAX_EVENTS
+        return cls(path, process_name, max_events)
+
+    @staticmethod
+    def now():
+        return time.perf_counter()
+
+    # ---- イベント記録（時刻はすべて perf_counter の秒） ----
+    def complete(self, name, start, end=None, args=None, cat="game"):
+        """開始・終了時刻が分かっているスパン（ph: X）"""
+        if end is None:
+            end = time.perf_counter()
+        event = {
+            "name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": 0,
+            "ts": start * 1e6, "dur": (end - start) * 1e6,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, name, args=None, cat="game"):
+        event = {
+            "name": name, "cat": cat, "ph": "i", "s": "p", "pid": self.pid, "tid": 0,
+            "ts": time.perf_counter() * 1e6,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def flow(self, phase, flow_id, name="frame", cat="ipc"):
+        """フレーム ID で send_state → on_tick → 受信 を矢印でつなぐ（phase: s / t / f）"""
+        event = {
+            "name": name, "cat": cat, "ph": phase, "id": flow_id,
+            "pid": self.pid, "tid": 0, "ts": time.perf_counter() * 1e6,
+        }
+        if phase == "f":
+            event["bp"] = "e"
+        self.events.append(event)
+
+    def span(self, name, args=None, cat="game"):
+        """with 文で使うスパン（再起動やリロードなど頻度の低い処理向け）"""
+        return _Span(self, name, args, cat)
+
+    # ---- プロセス間の受け渡し ----
+    def drain(self):
+        """バッファの中身を取り出して空にする（custom_runner → ゲーム本体への送信用）"""
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def extend(self, events, process_name=None):
+        for event in events:
+            self.events.append(event)
+        if process_name and events:
+            self.process_names[events[0].get("pid")] = process_name
+
+    # ---- 書き出し ----
+    def write(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}}
+            for pid, name in self.process_names.items()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}, f)
+        print(f"trace written to {path} ({len(self.events)} events)")
+
+
+class _Span:
+    def __init__(self, tracer, name, args, cat):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.cat = cat
+        self.start = None
+
+    def __enter__(self):
+        if self.tracer.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            self.tracer.complete(self.name, self.start, args=self.args, cat=self.cat)
+        return False
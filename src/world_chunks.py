@@ -0,0 +1,166 @@
+# world_chunks.py
+# 動かない地形（地面・崖・止まっている足場）を world_x 方向に一定幅のチャンクに分けて扱う
+#
+# 描画: チャンクごとに地面と足場を描いた Surface を初めて見えたときに作り、画面に映る分だけ blit する。
+#       カメラから離れたチャンクは捨てる。動いている足場はチャンクに入れず、毎フレーム描く。
+#       地面のレイヤーはプレイヤーより下、足場のレイヤーはプレイヤーより上に描く（今までの重なり順）。
+# 判定: 足場をチャンクごとに索引しておき、プレイヤーの近くの足場だけを調べる（platforms_near）。
+#       崖は開始位置でソートしておき、二分探索で地面があるかを調べる（on_ground）。
+# どちらもレベル全体の長さではなく、画面に映る範囲の量にだけ比例する。
+#
+# 足場・崖・地面の高さや色が変わったら invalidate() を呼ぶこと（チャンクと索引を作り直す）。
+from bisect import bisect_right
+import math
+
+import pygame
+
+
+# チャンクの透明部分に使う色（地面・足場の色と重ならない色）
+COLORKEY = (255, 0, 255)
+
+
+def _fill_box(surface, rect, fill, outline, border):
+    """pygame.draw.rect の塗り＋枠線と同じ見た目を fill で描く（はみ出した部分は素直に切り取る）"""
+    x, y, width, height = rect
+    bounds = surface.get_rect()
+    # Surface.fill は負の座標の矩形をずらして塗ってしまうので、先に切り取っておく
+    for part, color in (((x, y, width, height), fill),
+                        ((x, y, width, border), outline),
+                        ((x, y + height - border, width, border), outline),
+                        ((x, y, border, height), outline),
+                        ((x + width - border, y, border, height), outline)):
+        part = bounds.clip(part)
+        if part.width and part.height:
+            surface.fill(color, part)
+
+
+class WorldChunks:
+    def __init__(self, chunk_width=512, keep_chunks=2):
+        self.chunk_width = chunk_width
+        self.keep_chunks = keep_chunks   # 画面の外に何チャンクまで残しておくか
+        self.version = 0                 # invalidate() のたびに増える（dirty_rects の判定に使う）
+        self._chunks = {}                # チャンク番号 -> (地面の Surface, 地面の y, 足場の Surface, 足場の y)
+        self._platforms = []
+        self._cliffs = []
+        self._ground_y = 0
+        self._screen_height = 0
+        self._ground_color = (0, 0, 0)
+        self._static_by_chunk = {}       # チャンク番号 -> そのチャンクにかかる止まっている足場の番号
+        self.moving = []                 # 動いている足場の番号（毎フレーム update する）
+        self._cliff_starts = []
+        self._cliff_max_ends = []
+        self.rendered = 0                # 作ったチャンクの数（計測用）
+
+    def invalidate(self, platforms, cliffs, ground_y, screen_height, ground_color):
+        """地形が変わったときに呼ぶ。チャンクを捨てて足場と崖の索引を作り直す"""
+        self.version += 1
+        self._chunks.clear()
+        self._platforms = platforms
+        self._cliffs = sorted(cliffs or [], key=lambda c: c['start_x'])
+        self._ground_y = ground_y
+        self._screen_height = screen_height
+        self._ground_color = tuple(ground_color)
+
+        self._static_by_chunk = {}
+        self.moving = []
+        w = self.chunk_width
+        for i, platform in enumerate(platforms):
+            if platform.move_enabled:
+                self.moving.append(i)
+                continue
+            first = math.floor(platform.world_x / w)
+            last = math.floor((platform.world_x + platform.width) / w)
+            for c in range(first, last + 1):
+                self._static_by_chunk.setdefault(c, []).append(i)
+
+        # 崖は重なっていてもよいので、開始位置の順に「そこまでの終了位置の最大」を持つ
+        self._cliff_starts = [c['start_x'] for c in self._cliffs]
+        self._cliff_max_ends = []
+        max_end = -math.inf
+        for c in self._cliffs:
+            max_end = max(max_end, c['end_x'])
+            self._cliff_max_ends.append(max_end)
+
+    # ---- 判定 ----
+    def on_ground(self, world_x):
+        """level.is_on_ground と同じ（崖の区間 [start_x, end_x] の中なら False）"""
+        i = bisect_right(self._cliff_starts, world_x) - 1
+        return i < 0 or self._cliff_max_ends[i] < world_x
+
+    def platforms_near(self, left, right):
+        """world_x が [left, right] にかかるかもしれない足場の番号を小さい順に返す（動いている足場は全部）"""
+        w = self.chunk_width
+        found = set(self.moving)
+        for c in range(math.floor(left / w), math.floor(right / w) + 1):
+            found.update(self._static_by_chunk.get(c, ()))
+        return sorted(found)
+
+    # ---- 描画 ----
+    def _visible_chunks(self, camera_x, screen_width):
+        w = self.chunk_width
+        return range(math.floor(camera_x / w), math.floor((camera_x + screen_width) / w) + 1)
+
+    def _render(self, c):
+        w = self.chunk_width
+        left = c * w
+
+        # 地面（崖の間の区間ごとに、白い塗りと枠線。区間の端が画面の端でも枠は描かない）
+        ground_h = self._screen_height - self._ground_y
+        ground = None
+        if ground_h > 0:
+            ground = pygame.Surface((w, ground_h)).convert()
+            ground.fill(COLORKEY)
+            ground.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            start = -math.inf
+            for cliff in self._cliffs + [{'start_x': math.inf, 'end_x': math.inf}]:
+                end = cliff['start_x']
+                if end > start and end > left and start < left + w:
+                    # チャンクから大きくはみ出す分は切り詰める（枠線がチャンク内に入らない位置まで）
+                    x0 = max(start, left - 8) - left
+                    x1 = min(end, left + w + 8) - left
+                    _fill_box(ground, (int(x0), 0, int(x1) - int(x0), ground_h),
+                              (255, 255, 255), self._ground_color, 3)
+                start = max(start, cliff['end_x'])
+
+        # 止まっている足場
+        indices = self._static_by_chunk.get(c, [])
+        platform_layer = None
+        top = 0
+        if indices:
+            items = [self._platforms[i] for i in indices]
+            top = min(int(p.y) for p in items)
+            bottom = max(int(p.y) + p.height for p in items)
+            platform_layer = pygame.Surface((w, bottom - top)).convert()
+            platform_layer.fill(COLORKEY)
+            platform_layer.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            for p in items:
+                _fill_box(platform_layer, (int(p.world_x) - left, int(p.y) - top, p.width, p.height),
+                          (255, 255, 255), p.color, 3)
+
+        self.rendered += 1
+        return ground, self._ground_y, platform_layer, top
+
+    def _chunks_for(self, camera_x, screen_width):
+        visible = self._visible_chunks(camera_x, screen_width)
+        # 離れたチャンクを捨てる
+        lo = visible.start - self.keep_chunks
+        hi = visible.stop + self.keep_chunks
+        for c in [c for c in self._chunks if c < lo or c >= hi]:
+            del self._chunks[c]
+        for c in visible:
+            if c not in self._chunks:
+                self._chunks[c] = self._render(c)
+            yield c, self._chunks[c]
+
+    def draw_ground(self, surface, camera_x):
+        """画面に映るチャンクの地面を描く"""
+        for c, (ground, ground_y, _, _) in self._chunks_for(camera_x, surface.get_width()):
+            if ground is not None:
+                surface.blit(ground, (math.floor(c * self.chunk_width - camera_x), ground_y))
+
+    def draw_platforms(self, surface, camera_x):
+        """止まっている足場を描き、動いている足場は 1 つずつ描く。動いている足場の Rect のリストを返す"""
+        for c, (_, _, layer, top) in self._chunks_for(camera_x, surface.get_width()):
+            if layer is not None:
+                surface.blit(layer, (math.floor(c * self.chunk_width - camera_x), top))
+        return [self._platforms[i].draw(surface, camera_x) for i in self.moving]